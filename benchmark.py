@@ -0,0 +1,110 @@
+"""Headless timings for the maze generators and solvers.
+
+    python benchmark.py --sizes 100 200 400 --break-walls 0
+    python benchmark.py --import-time
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+from py_maze.maze_obj import Maze
+from py_maze.registry import GENERATORS, SOLVERS
+
+# Everything a headless script needs to generate and solve a maze
+CORE_MODULES = ["py_maze.maze_obj", "py_maze.generators", "py_maze.solvers"]
+IMPORT_BUDGET = 0.05
+
+_IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    __import__(module)
+elapsed = time.perf_counter() - start
+print(elapsed, any(name == "Qt" or name.startswith("PyQt") for name in sys.modules))
+"""
+
+
+def time_generator(generator, size, break_walls_chance, braid=0):
+    maze = Maze()
+    maze.set_bounds(size, size)
+    start = time.perf_counter()
+    gen = generator(maze, break_walls_chance, False)
+    gen.first_step()
+    while gen.not_done():
+        gen.step()
+    if braid:
+        maze.braid(braid)
+    return time.perf_counter() - start, maze
+
+
+def time_solver(solver, maze):
+    start = time.perf_counter()
+    route = solver(maze, False).solve()
+    return time.perf_counter() - start, len(route)
+
+
+def time_import(modules, runs=5):
+    """Best cold import time of modules over runs fresh interpreters, and whether any of
+    them pulled Qt in."""
+    best, qt = None, False
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE, *modules],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        elapsed = float(out[0])
+        best = elapsed if best is None else min(best, elapsed)
+        qt = qt or out[1] == "True"
+    return best, qt
+
+
+def report_import_time():
+    elapsed, qt = time_import(CORE_MODULES)
+    print(
+        "core import {:.1f} ms (budget {:.0f} ms){}".format(
+            elapsed * 1000, IMPORT_BUDGET * 1000, ", loads Qt" if qt else ""
+        )
+    )
+    return elapsed < IMPORT_BUDGET and not qt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--break-walls", type=int, default=0)
+    parser.add_argument("--braid", type=float, default=0, help="fraction of dead ends")
+    parser.add_argument("--generators", nargs="+", help="display names to time")
+    parser.add_argument("--no-solve", action="store_true")
+    parser.add_argument(
+        "--import-time", action="store_true", help="only time the core's cold import"
+    )
+    args = parser.parse_args()
+
+    if args.import_time:
+        sys.exit(0 if report_import_time() else 1)
+
+    print("{:<28}{:>8}{:>12}".format("generator", "size", "seconds"))
+    for name, generator in GENERATORS.items():
+        if args.generators and name not in args.generators:
+            continue
+        for size in args.sizes:
+            elapsed, maze = time_generator(
+                generator, size, args.break_walls, args.braid
+            )
+            print("{:<28}{:>8}{:>12.3f}".format(name, size, elapsed))
+            if args.no_solve:
+                continue
+            for solver_name, solver in SOLVERS.items():
+                elapsed, length = time_solver(solver, maze)
+                print(
+                    "  {:<26}{:>8}{:>12.3f}  route {}".format(
+                        solver_name, size, elapsed, length
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .maze_obj import Maze
+
+DEFAULT_CHUNK = 256
+# Mazes with more cells than this are handed to the executor, if one is given
+OFFLOAD_CELLS = 250_000
+
+
+def _make_maze(x, y):
+    maze = Maze()
+    maze.set_bounds(x, y)
+    return maze
+
+
+def _generate_blocking(generator, x, y, break_walls_chance, cancel):
+    maze = _make_maze(x, y)
+    gen = generator(maze, break_walls_chance, True)
+    gen.first_step()
+    while gen.not_done():
+        if cancel.is_set():
+            raise asyncio.CancelledError()
+        for _ in range(DEFAULT_CHUNK):
+            if not gen.not_done():
+                break
+            gen.step()
+    return maze
+
+
+def _generate_packed(generator, x, y, break_walls_chance):
+    maze = _make_maze(x, y)
+    gen = generator(maze, break_walls_chance, False)
+    gen.first_step()
+    while gen.not_done():
+        gen.step()
+    return maze.packed()
+
+
+def _solve_packed(solver, packed):
+    return solver(Maze.from_walls(*packed), False).solve()
+
+
+async def _offload(executor, func, *args):
+    """Runs func in a thread executor, asking it to stop between chunks if cancelled."""
+    cancel = threading.Event()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, func, *args, cancel
+        )
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+
+
+async def generate(
+    generator,
+    x,
+    y,
+    break_walls_chance=0,
+    chunk=DEFAULT_CHUNK,
+    executor=None,
+    offload_above=OFFLOAD_CELLS,
+):
+    """Generates a maze without blocking the event loop. Small mazes are stepped on the
+    loop itself, yielding every chunk steps. Large ones go to the executor when given: a
+    thread executor is told to stop between chunks on cancellation, a process executor
+    builds the maze remotely and ships back its packed walls (cancelling only abandons
+    that result)."""
+    if executor is not None and x * y > offload_above:
+        if isinstance(executor, ProcessPoolExecutor):
+            packed = await asyncio.get_running_loop().run_in_executor(
+                executor, _generate_packed, generator, x, y, break_walls_chance
+            )
+            return Maze.from_walls(*packed)
+        return await _offload(
+            executor, _generate_blocking, generator, x, y, break_walls_chance
+        )
+
+    maze = _make_maze(x, y)
+    async for _ in generator(maze, break_walls_chance, True).events(chunk):
+        pass
+    return maze
+
+
+async def solve(
+    maze, solver, chunk=DEFAULT_CHUNK, executor=None, offload_above=OFFLOAD_CELLS
+):
+    """Solves a maze without blocking the event loop and returns the route, following
+    the same rules as generate() for when to use the executor. An offloaded solve runs
+    the solver's own solve(), so cancelling it only abandons the result."""
+    if executor is not None and maze.x * maze.y > offload_above:
+        loop = asyncio.get_running_loop()
+        if isinstance(executor, ProcessPoolExecutor):
+            return await loop.run_in_executor(
+                executor, _solve_packed, solver, maze.packed()
+            )
+        return await loop.run_in_executor(executor, solver(maze, False).solve)
+
+    runner = solver(maze, True)
+    runner.set_up()
+    runner.check_finished()
+    count = 0
+    while not runner.finished and runner.not_done():
+        runner._step()
+        runner.check_finished()
+        count += 1
+        if not count % chunk:
+            await asyncio.sleep(0)
+    return runner.solution() if runner.finished else []
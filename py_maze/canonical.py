@@ -0,0 +1,152 @@
+"""Canonical forms and digests for spotting duplicate mazes, rotations and mirror images
+included, plus an on-disk digest index for deduplicating large generated corpora."""
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+from .wallmask import from_source
+
+# Wall mask bits after a quarter turn clockwise, and after mirroring left to right
+_ROTATE = np.array([(m << 1 | m >> 3) & 0b1111 for m in range(256)], dtype=np.uint8)
+_MIRROR = np.array(
+    [m & 0b0101 | (m & 0b0010) << 2 | (m & 0b1000) >> 2 for m in range(256)],
+    dtype=np.uint8,
+)
+_KEY_HEADER = struct.Struct("<IIiiiiBB")
+DIGEST_SIZE = 16
+
+
+def _rotate(mask, start, end, start_side, end_side):
+    """A quarter turn clockwise: cell (i, j) of x by y moves to (y - 1 - j, i)."""
+    height = mask.shape[1]
+    return (
+        _ROTATE[mask[:, ::-1].T],
+        (height - 1 - start[1], start[0]),
+        (height - 1 - end[1], end[0]),
+        (start_side + 1) % 4,
+        (end_side + 1) % 4,
+    )
+
+
+def _mirror(mask, start, end, start_side, end_side):
+    width = mask.shape[0]
+    return (
+        _MIRROR[mask[::-1]],
+        (width - 1 - start[0], start[1]),
+        (width - 1 - end[0], end[1]),
+        (4 - start_side) % 4,
+        (4 - end_side) % 4,
+    )
+
+
+def symmetries(source):
+    """The 8 dihedral images of a Maze or Maze.packed() tuple, each as (mask, start,
+    end, start_side, end_side) with int sides."""
+    if hasattr(source, "packed"):
+        source = source.packed()
+    _, _, _, start, end, start_side, end_side = source[:7]
+    state = (
+        from_source(source),
+        tuple(start),
+        tuple(end),
+        start_side,
+        end_side,
+    )
+    for _ in range(2):
+        for _ in range(4):
+            yield state
+            state = _rotate(*state)
+        state = _mirror(*state)
+
+
+def _key(mask, start, end, start_side, end_side):
+    header = _KEY_HEADER.pack(*mask.shape, *start, *end, start_side, end_side)
+    return header + mask.tobytes()
+
+
+def canonical(source):
+    """The symmetry whose size, packed walls and start/end sort lowest, laid out like
+    Maze.packed() without the origin so Maze.from_walls() can rebuild it."""
+    mask, start, end, start_side, end_side = min(
+        symmetries(source), key=lambda state: _key(*state)
+    )
+    return (
+        bytearray(mask.tobytes()),
+        *mask.shape,
+        list(start),
+        list(end),
+        start_side,
+        end_side,
+    )
+
+
+def digest(source):
+    """128 bit digest of the canonical form, the same for every rotation and mirror."""
+    key = min(_key(*state) for state in symmetries(source))
+    return hashlib.blake2b(key, digest_size=DIGEST_SIZE).digest()
+
+
+class DigestIndex:
+    """Persistent set of maze digests. Saved digests live in a sorted file of fixed size
+    records that is memory mapped and binary searched, so opening the index never
+    rereads or rehashes the corpus. New digests are held in memory until flush() merges
+    them in.
+
+        with DigestIndex("corpus.idx") as seen:
+            for maze in mazes:
+                if seen.add_maze(maze):
+                    keep(maze)
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.pending = set()
+        self._saved = self._open()
+
+    def _open(self):
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return np.empty(0, dtype="S{}".format(DIGEST_SIZE))
+        return np.memmap(self.path, dtype="S{}".format(DIGEST_SIZE), mode="r")
+
+    def __len__(self):
+        return len(self._saved) + len(self.pending)
+
+    def __contains__(self, value):
+        if value in self.pending:
+            return True
+        # Compare as numpy bytes on both sides, numpy scalars drop trailing zero bytes
+        needle = np.array(value, dtype=self._saved.dtype)
+        i = np.searchsorted(self._saved, needle)
+        return bool(i < len(self._saved) and self._saved[i] == needle)
+
+    def add(self, value):
+        """Adds a digest, returning False if it was already there."""
+        if value in self:
+            return False
+        self.pending.add(value)
+        return True
+
+    def add_maze(self, source):
+        return self.add(digest(source))
+
+    def flush(self):
+        if not self.pending:
+            return
+        new = np.array(sorted(self.pending), dtype=self._saved.dtype)
+        merged = np.concatenate((self._saved, new))
+        merged.sort(kind="stable")
+        tmp = "{}.tmp".format(self.path)
+        merged.tofile(tmp)
+        # Drop the map before replacing the file it points at
+        self._saved = merged
+        os.replace(tmp, self.path)
+        self.pending.clear()
+        self._saved = self._open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
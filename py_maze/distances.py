@@ -0,0 +1,78 @@
+"""Bit-parallel multi-source breadth first search over the wall mask.
+
+Each cell keeps a uint64 of which sources' frontiers it is on, so one level of the
+search moves up to 64 sources at once with a shift and an AND per direction. Unlike tree
+based indexes this works on braided mazes with loops."""
+import numpy as np
+
+from .wallmask import BOTTOM, RIGHT, from_source
+
+# Sources searched together, one per bit of a cell's uint64
+BATCH = 64
+
+
+def _passages(mask):
+    """All ones where a passage leads right from column i to i + 1 / down from row j to
+    j + 1, ready to AND with a frontier."""
+    ones = np.uint64(0xFFFFFFFFFFFFFFFF)
+    right = np.where(mask[:-1] & RIGHT != 0, ones, np.uint64(0))
+    down = np.where(mask[:, :-1] & BOTTOM != 0, ones, np.uint64(0))
+    return right, down
+
+
+def _expand(frontier, right, down):
+    reached = np.zeros_like(frontier)
+    reached[1:] |= frontier[:-1] & right
+    reached[:-1] |= frontier[1:] & right
+    reached[:, 1:] |= frontier[:, :-1] & down
+    reached[:, :-1] |= frontier[:, 1:] & down
+    return reached
+
+
+def _bits(words, count):
+    """(len(words), count) bool array of the low count bits of each uint64."""
+    little = words.astype("<u8").view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(little, axis=1, bitorder="little")[:, :count].astype(bool)
+
+
+def _search(right, down, shape, sources, targets, out):
+    frontier = np.zeros(shape, dtype=np.uint64)
+    for bit, (x, y) in enumerate(sources):
+        frontier[x, y] |= np.uint64(1 << bit)
+    seen = frontier.copy()
+    flat_frontier, flat_seen = frontier.reshape(-1), seen.reshape(-1)
+    full = np.uint64((1 << len(sources)) - 1)
+    level = 0
+    while True:
+        hits = _bits(flat_frontier[targets], len(sources))
+        out[hits.T] = level
+        if (flat_seen[targets] == full).all():
+            return
+        frontier = _expand(frontier, right, down) & ~seen
+        if not frontier.any():
+            return
+        seen |= frontier
+        flat_frontier = frontier.reshape(-1)
+        level += 1
+
+
+def distance_matrix(maze, sources, targets=None):
+    """Steps from every source to every target, -1 where a target can't be reached.
+
+    maze is a Maze or the tuple from Maze.packed(), sources and targets are [x, y]
+    pairs. Without targets every cell is a target, in flat index order. Returns an int32
+    array of shape (len(sources), len(targets)).
+    """
+    mask = from_source(maze)
+    x, y = mask.shape
+    if targets is None:
+        flat_targets = np.arange(x * y)
+    else:
+        flat_targets = np.array([tx * y + ty for tx, ty in targets], dtype=np.intp)
+    right, down = _passages(mask)
+    out = np.full((len(sources), len(flat_targets)), -1, dtype=np.int32)
+    for start in range(0, len(sources), BATCH):
+        batch = sources[start : start + BATCH]
+        rows = out[start : start + len(batch)]
+        _search(right, down, mask.shape, batch, flat_targets, rows)
+    return out
@@ -0,0 +1,155 @@
+"""Renders mazes to PNG and SVG straight from their packed walls, so it needs neither Qt
+nor a display and can run in headless worker processes."""
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .wallmask import BOTTOM, LEFT, RIGHT, TOP, from_source
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREEN = (0, 255, 0)
+
+
+def wall_segments(mask):
+    """Closed sides as two boolean grids: horizontal[j, i] is the wall along the top of
+    row j under column i (row y being the bottom edge), vertical[j, i] the wall down the
+    left of column i beside row j."""
+    x, y = mask.shape
+    horizontal = np.empty((y + 1, x), dtype=bool)
+    horizontal[:y] = (mask & TOP == 0).T
+    horizontal[y] = mask[:, -1] & BOTTOM == 0
+    vertical = np.empty((y, x + 1), dtype=bool)
+    vertical[:, :x] = (mask & LEFT == 0).T
+    vertical[:, x] = mask[-1] & RIGHT == 0
+    return horizontal, vertical
+
+
+def render_pixels(source, cell=8, route=None, colours=None):
+    """RGB pixel buffer of the maze, cell pixels per cell plus one wide wall lines, with
+    the cells on route ([x, y] pairs) filled in. colours is an optional (x, y, 3) array
+    of cell backgrounds, white otherwise."""
+    mask = from_source(source)
+    x, y = mask.shape
+    horizontal, vertical = wall_segments(mask)
+    image = np.empty((y * cell + 1, x * cell + 1, 3), dtype=np.uint8)
+    image[:] = WHITE
+    if colours is not None:
+        image[: y * cell, : x * cell] = np.repeat(
+            np.repeat(colours.transpose(1, 0, 2), cell, 0), cell, 1
+        )
+
+    if route:
+        on_route = np.zeros((y, x), dtype=bool)
+        xs, ys = np.asarray(route).T
+        on_route[ys, xs] = True
+        fill = np.repeat(np.repeat(on_route, cell, 0), cell, 1)
+        # Leave the grid lines alone, they are drawn over below
+        fill[::cell] = False
+        fill[:, ::cell] = False
+        image[: y * cell, : x * cell][fill] = GREEN
+
+    image[::cell, : x * cell][np.repeat(horizontal, cell, 1)] = BLACK
+    image[: y * cell, ::cell][np.repeat(vertical, cell, 0)] = BLACK
+    # Grid corners are black when any wall meets them
+    corners = np.zeros((y + 1, x + 1), dtype=bool)
+    corners[:, :-1] |= horizontal
+    corners[:, 1:] |= horizontal
+    corners[:-1] |= vertical
+    corners[1:] |= vertical
+    image[::cell, ::cell][corners] = BLACK
+    return image
+
+
+def _chunk(tag, data):
+    return (
+        struct.pack(">I", len(data))
+        + tag
+        + data
+        + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(image, level=6):
+    """Encodes an RGB uint8 (height, width, 3) buffer as PNG bytes."""
+    height, width, _ = image.shape
+    # Every scanline starts with filter type 0
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 3)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + _chunk(b"IDAT", zlib.compress(raw.tobytes(), level))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def to_png(source, cell=8, route=None):
+    return encode_png(render_pixels(source, cell, route))
+
+
+def _runs(line):
+    """(start, stop) of every run of True in a 1D boolean array."""
+    edges = np.diff(np.concatenate(([0], line.view(np.int8), [0])))
+    return zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))
+
+
+def to_svg(source, cell=8, route=None):
+    """SVG of the maze, collinear walls merged into a single path segment each."""
+    mask = from_source(source)
+    x, y = mask.shape
+    horizontal, vertical = wall_segments(mask)
+    path = []
+    for j, row in enumerate(horizontal):
+        for start, stop in _runs(row):
+            path.append("M{} {}H{}".format(start * cell, j * cell, stop * cell))
+    for i, column in enumerate(vertical.T):
+        for start, stop in _runs(column):
+            path.append("M{} {}V{}".format(i * cell, start * cell, stop * cell))
+
+    width, height = x * cell, y * cell
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+        'viewBox="-1 -1 {2} {3}">'.format(width, height, width + 2, height + 2),
+        '<rect x="0" y="0" width="{}" height="{}" fill="white"/>'.format(width, height),
+    ]
+    if route:
+        half = cell / 2
+        points = " ".join(
+            "{:g},{:g}".format(i * cell + half, j * cell + half) for i, j in route
+        )
+        parts.append(
+            '<polyline points="{}" fill="none" stroke="lime" stroke-width="{:g}" '
+            'stroke-linejoin="round"/>'.format(points, half)
+        )
+    parts.append(
+        '<path d="{}" stroke="black" stroke-width="1" stroke-linecap="square" '
+        'fill="none"/>'.format("".join(path))
+    )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def export(source, path, cell=8, route=None):
+    """Writes a maze to path, as SVG when it ends in .svg and PNG otherwise."""
+    if str(path).lower().endswith(".svg"):
+        with open(path, "w") as f:
+            f.write(to_svg(source, cell, route))
+    else:
+        with open(path, "wb") as f:
+            f.write(to_png(source, cell, route))
+    return path
+
+
+def _export_job(job):
+    return export(*job)
+
+
+def export_many(jobs, processes=None, chunksize=16):
+    """Exports (packed, path[, cell[, route]]) jobs in a process pool. Pass packed walls
+    rather than mazes so only bytes cross to the workers. Returns the written paths in
+    order."""
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(_export_job, jobs, chunksize=chunksize))
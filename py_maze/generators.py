@@ -1,3 +1,5 @@
+from array import array
+
 from . import maze_utils
 from .maze_utils import DIRECTION
 
@@ -5,69 +7,138 @@ from .maze_utils import DIRECTION
 class GenBase:
     visible = False
     display = ""
+    # Whether the generator works from the topology tables alone, see topology.py. The
+    # rest assume the square grid's four directions.
+    any_topology = False
 
     def __init__(self, maze, break_walls_chance, watch=True) -> None:
+        if not self.any_topology and maze.topology and maze.topology.name != "square":
+            raise ValueError(
+                "{} needs a square grid, not {}".format(
+                    self.display, maze.topology.name
+                )
+            )
         self.maze = maze
+        self.maze.origin = (self.display, break_walls_chance)
         self.break_walls_chance = break_walls_chance
         self._step = None
         self.watch = watch
+        # Steps taken so far, for the GUI's stats
+        self.steps = 0
 
     def first_step(self):
         raise NotImplementedError
 
     def step(self):
         self._step()
+        self.steps += 1
         while not self.watch and self.not_done():
             self._step()
+            self.steps += 1
 
     def not_done(self):
         return self._step is not None
 
+    async def events(self, chunk=256):
+        """Runs the generator as an async iterator yielding (step count, phase) for
+        every step, handing control back to the event loop every chunk steps."""
+        # Imported here so the core does not pay for asyncio unless it is used
+        import asyncio
+
+        self.first_step()
+        count = 0
+        while self.not_done():
+            phase = self._step.__name__
+            self._step()
+            count += 1
+            yield count, phase
+            if not count % chunk:
+                await asyncio.sleep(0)
+
 
 class RecursiveGenerator(GenBase):
+    """Only the compact mode works on other topologies, it is used for them whatever
+    compact says."""
+
     visible = True
     display = "Recursive Backtracing"
+    any_topology = True
 
-    def __init__(self, maze, break_walls_chance, watch=True) -> None:
+    def __init__(self, maze, break_walls_chance, watch=True, compact=True) -> None:
         super().__init__(maze, break_walls_chance, watch)
+        self.compact = compact or maze.topology.name != "square"
         self.stack = []
+        self.remaining = bytearray()
 
     def first_step(self):
-        """Creates a maze using the recursive backtracking algorithm."""
-        x, y = self.maze.start
+        """Creates a maze using the recursive backtracking algorithm. Stack entries are
+        packed as index << 2 | direction."""
+        if self.compact:
+            self._compact_first_step()
+            return
+        index = self.maze.start_index
         self.stack = []
         for dir in maze_utils.make_direction_list():
-            x0, y0 = maze_utils.take_step(dir, x, y)
-            if not self.maze.out_of_bounds(x0, y0):
-                self.stack = [[dir, x0, y0] for dir in maze_utils.make_direction_list()]
-                maze_utils.carve_path(self.maze, x, y, x0, y0, dir)
+            target = self.maze.step_index(index, dir.value)
+            if target >= 0:
+                self.stack = [
+                    target << 2 | dir1.value
+                    for dir1 in maze_utils.make_direction_list()
+                ]
+                maze_utils.carve_index(self.maze, index, target, dir.value)
                 break
         self._step = self._take_step
 
     def _take_step(self):
         while self.stack:
-            dir, x, y = self.stack.pop(-1)
-            tx, ty = maze_utils.create_walk(
-                self.maze, x, y, dir, self.break_walls_chance
+            packed = self.stack.pop()
+            target = maze_utils.walk_index(
+                self.maze, packed >> 2, packed & 3, self.break_walls_chance
             )
-            if tx is not None:
+            if target >= 0:
                 self.stack.extend(
-                    [
-                        [dir1, tx, ty]
-                        for dir1 in maze_utils.make_direction_list()
-                        if dir1 is not maze_utils.opposite(dir)
-                        or not self.maze.out_of_bounds(tx, ty)
-                    ]
+                    target << 2 | dir1.value
+                    for dir1 in maze_utils.make_direction_list()
                 )
                 return
+        self._connect_exit()
+
+    def _compact_first_step(self):
+        """Compact mode keeps only cell indices on the stack, with a mask per cell of
+        the directions it has yet to try."""
+        self.stack = array("I", [self.maze.start_index])
+        self.remaining = bytearray([self.maze.topology.full]) * len(self.maze.mask)
+        self._step = self._compact_step
+
+    def _compact_step(self):
+        stack, remaining = self.stack, self.remaining
+        topology = self.maze.topology
+        while stack:
+            index = stack[-1]
+            mask = remaining[index]
+            if not mask:
+                stack.pop()
+                continue
+            for dir in maze_utils.random_directions(topology):
+                if mask >> dir & 1:
+                    break
+            remaining[index] = mask & ~(1 << dir)
+            target = maze_utils.walk_index(
+                self.maze, index, dir, self.break_walls_chance
+            )
+            if target >= 0:
+                stack.append(target)
+                return
+        self._connect_exit()
+
+    def _connect_exit(self):
         # Connect exit to a valid cell
-        if self.maze.pos_is_unreached(*self.maze.end):
-            for dir in range(3):
-                tx, ty = maze_utils.take_step(dir, *self.maze.end)
-                if not self.maze.out_of_bounds(tx, ty):
-                    maze_utils.carve_path(
-                        self.maze, *self.maze.end, tx, ty, DIRECTION(dir)
-                    )
+        end = self.maze.end_index
+        if self.maze.index_is_unreached(end):
+            for dir in range(self.maze.topology.count):
+                target = self.maze.step_index(end, dir)
+                if target >= 0:
+                    maze_utils.carve_index(self.maze, end, target, dir)
                     break
         self._step = None
         self.maze.clear_current()
@@ -83,33 +154,37 @@ class HuntAndKill(GenBase):
         self.unfinished_columns = []
 
     def first_step(self):
+        # Walk candidates packed as index << 2 | direction
         self.stack = [
-            [dir, *self.maze.start]
+            self.maze.start_index << 2 | dir.value
             for dir in maze_utils.make_direction_list()
-            if dir != self.maze.start_side
+            if dir.value != self.maze.start_side
         ]
         self.unfinished_rows = [y for y in range(0, self.maze.y)]
 
         self._step = self._hunt_and_kill
 
     def _hunt_and_kill(self):
-        """Randomly walks along a segment until you can go no further. Only considers no further as
-        a wall to either out of bounds or an initialized cell and all directions have been exhausted.
+        """Randomly walks along a segment until you can go no further. Only considers no
+        further as a wall to either out of bounds or an initialized cell and all
+        directions have been exhausted.
         """
 
         while self.unfinished_rows:
             while self.stack:
-                dir, x, y = self.stack.pop(0)
-                self.maze[x, y].visited = True
-                tx, ty = maze_utils.create_walk(self.maze, x, y, dir)
-                if tx is not None:
+                packed = self.stack.pop(0)
+                dir = packed & 3
+                self.maze.cells[packed >> 2].visited = True
+                target = maze_utils.walk_index(self.maze, packed >> 2, dir)
+                if target >= 0:
+                    back = maze_utils.OPPOSITE[dir]
                     self.stack = [
-                        [dir1, tx, ty]
+                        target << 2 | dir1.value
                         for dir1 in maze_utils.make_direction_list()
-                        if dir1 != maze_utils.opposite(dir)
+                        if dir1.value != back
                     ]
                     return
-            # We have reached the end of our walk, find a new place to start walking from.
+            # We have reached the end of our walk, find a new place to start from.
             self.unfinished_columns = [
                 x
                 for x in range(0, self.maze.x)
@@ -120,24 +195,27 @@ class HuntAndKill(GenBase):
         self._step = self._finalize
 
     def _hunt(self):
-        """Scan the current row for a new cell to start walking from. If the current row has not been exhausted of matches it will start
-        walking from cells that have been initialized"""
+        """Scan the current row for a new cell to start walking from. If the current row
+        has not been exhausted of matches it will start walking from cells that have
+        been initialized"""
         while self.unfinished_rows:
             y = self.unfinished_rows[0]
             while self.unfinished_columns:
                 x = self.unfinished_columns.pop(0)
                 self.maze.set_current(x, y)
+                index = self.maze.index(x, y)
+                # The end is carved into but never walked from, it is joined on already
+                if not self.maze.index_is_unreached(index):
+                    self.maze.cells[index].visited = True
+                    return
                 # Try to find a visited cell next to ours to start walking from
                 for dir in maze_utils.make_direction_list():
-                    tx, ty = maze_utils.take_step(dir, x, y)
+                    target = self.maze.step_index(index, dir.value)
 
-                    if (
-                        not self.maze.out_of_bounds(tx, ty)
-                        and self.maze[tx, ty].visited
-                    ):
-                        maze_utils.carve_path(self.maze, x, y, tx, ty, dir)
+                    if target >= 0 and self.maze.cells[target].visited:
+                        maze_utils.carve_index(self.maze, index, target, dir.value)
                         self.stack = [
-                            [dir1, x, y]
+                            index << 2 | dir1.value
                             for dir1 in maze_utils.make_direction_list()
                             if dir1 != dir
                         ]
@@ -160,13 +238,12 @@ class HuntAndKill(GenBase):
 
     def _finalize(self):
         """Connect exit to a valid cell if not already."""
-        if self.maze.pos_is_unreached(*self.maze.end):
+        end = self.maze.end_index
+        if self.maze.index_is_unreached(end):
             for dir in range(4):
-                tx, ty = maze_utils.take_step(dir, *self.maze.end)
-                if not self.maze.out_of_bounds(tx, ty):
-                    maze_utils.carve_path(
-                        self.maze, *self.maze.end, tx, ty, DIRECTION(dir)
-                    )
+                target = self.maze.step_index(end, dir)
+                if target >= 0:
+                    maze_utils.carve_index(self.maze, end, target, dir)
                     break
         self.maze.clear_current()
         self._step = None
@@ -182,41 +259,45 @@ class Kruskal(GenBase):
         self.sets = []
 
     def first_step(self):
-        """Throw all the edges into a "bag" to randomly remove later.
-        Edges don't really exist in my maze implementation so we are storing coordinates of
-        cells that have a cell to their right or below them. These are the only edges that are
-        breakable."""
+        """Throw all the edges into a "bag" to randomly remove later. Edges don't really
+        exist in my maze implementation so we are storing coordinates of cells that have
+        a cell to their right or below them. These are the only edges that are
+        breakable. Edges are packed as index << 1 | dv."""
         bag = []
         for x in range(0, self.maze.x):
             for y in range(0, self.maze.y):
                 if x == (self.maze.x - 1) and y == (self.maze.y - 1):
                     continue
+                index = self.maze.index(x, y)
                 if x == (self.maze.x - 1):
-                    bag.append([0, x, y])
+                    bag.append(index << 1)
                 elif y == (self.maze.y - 1):
-                    bag.append([1, x, y])
+                    bag.append(index << 1 | 1)
                 else:
                     for i in range(2):  # 0 == down; 1 == right
-                        bag.append([i, x, y])
+                        bag.append(index << 1 | i)
         # Randomly sort the bag
         maze_utils.glRand.shuffle(bag)
         self.stack = bag
         self._step = self._kruskal_step
 
     def _kruskal_step(self):
-        """Pull an edge out of the bag. If the edge is between two cells that do not belong to
-        the same set, break the wall down and combine the sets."""
+        """Pull an edge out of the bag. If the edge is between two cells that do not
+        belong to the same set, break the wall down and combine the sets."""
         while self.stack:
-            dv, x, y = self.stack.pop(0)
+            # The bag is shuffled so taking from the end is as random as the front,
+            # without shifting the whole list every step
+            packed = self.stack.pop()
+            dv, index = packed & 1, packed >> 1
             # Edge is to the right
             if dv:
-                dx, dy = 1, 0
+                offset = self.maze.y
             # Edge is below
             else:
-                dx, dy = 0, 1
+                offset = 1
 
-            cell1 = self.maze[x, y]
-            cell2 = self.maze[x + dx, y + dy]
+            cell1 = self.maze.cells[index]
+            cell2 = self.maze.cells[index + offset]
 
             # Merge sets if they don't match or both are uninitialized.
             if cell1.set != cell2.set or cell1.set == -1:
@@ -241,6 +322,8 @@ class Eller(GenBase):
         super().__init__(maze, break_walls_chance, watch)
         self.sets = []
         self.bridge_sets = set()
+        # set -> columns of the current row in that set
+        self.row_members = {}
         self.row = 0
         self.column = 0
 
@@ -248,7 +331,8 @@ class Eller(GenBase):
         self._step = self._eller_init_row
 
     def _eller_init_row(self):
-        """Walk along the row and ensure every cell has been initialized(belongs to a valid set.)"""
+        """Walk along the row and ensure every cell has been initialized(belongs to a
+        valid set.)"""
         if self.column == self.maze.x:
             self._step = self._eller_join
             self.column = 0
@@ -256,26 +340,31 @@ class Eller(GenBase):
 
         node = self.maze[self.column, self.row]
         if node.set == -1:
-            node.set = len(self.sets)
-            self.sets.append(
-                [
-                    node,
-                ]
-            )
+            self._new_set(node)
         else:
             self.sets[node.set].append(node)
         self.maze.set_current(self.column, self.row)
         self.column += 1
 
+    def _new_set(self, node):
+        node.set = len(self.sets)
+        self.sets.append(
+            [
+                node,
+            ]
+        )
+
     def _eller_join(self):
-        """Scans a row of the maze and breaks walls based on a user defined random chance. If a wall is broken the cells sets
-        are udpated to be the same and sets are combined.
+        """Scans a row of the maze and breaks walls based on a user defined random
+        chance. If a wall is broken the cells sets are udpated to be the same and sets
+        are combined.
         """
         if self.maze.out_of_bounds(self.column + 1, self.row):
             self.column = 0
-            self.bridge_sets.update(
-                self.maze[i, self.row].set for i in range(self.maze.x)
-            )
+            self.row_members = {}
+            for i in range(self.maze.x):
+                self.row_members.setdefault(self.maze[i, self.row].set, []).append(i)
+            self.bridge_sets.update(self.row_members)
             self._step = self._eller_bridge
             return
 
@@ -292,7 +381,8 @@ class Eller(GenBase):
         self.column += 1
 
     def _eller_bridge(self):
-        """Walk along the row and randomly remove a wall from the the current cell and the cell below it."""
+        """Walk along the row and randomly remove a wall from the the current cell and
+        the cell below it."""
         # Check if we've reached a wall and can proceed to the next step
         if self.column == self.maze.x - 1:
             self._step = self._eller_reachable
@@ -312,15 +402,11 @@ class Eller(GenBase):
         self.column += 1
 
     def _eller_reachable(self):
-        """Ensure all the bridge sets have had at least one connection created to the row below it"""
+        """Ensure all the bridge sets have had at least one connection created to the
+        row below it"""
         while self.bridge_sets:
             _set = self.bridge_sets.pop()
-            randList = self.sets[_set][:]
-            maze_utils.glRand.shuffle(randList)
-            for cell1 in randList:
-                if int(cell1.pos().y()) == self.row:
-                    break
-            column = int(cell1.pos().x())
+            column = maze_utils.glRand.choice(self.row_members[_set])
             self.maze.set_current(column, self.row)
             maze_utils.combine_sets(
                 self.sets,
@@ -348,6 +434,10 @@ class Eller(GenBase):
         current = self.maze[self.column, self.row]
         adjacent = self.maze[self.column + 1, self.row]
         self.maze.set_current(self.column, self.row)
+        # Cells no bridge came down to are unassigned, so they all look like one set
+        for node in (current, adjacent):
+            if node.set == -1:
+                self._new_set(node)
         if current.set != adjacent.set:
             maze_utils.combine_sets(
                 self.sets, current, adjacent, maze_utils.DIRECTION.RIGHT
@@ -355,6 +445,277 @@ class Eller(GenBase):
         self.column += 1
 
 
+class AldousBroder(GenBase):
+    """Uniform spanning tree by random walk: wander the grid one cell per step, carving
+    into every cell the first time it is entered. break_walls_chance is not applied so
+    the tree stays uniform."""
+
+    visible = True
+    display = "Aldous-Broder"
+    any_topology = True
+
+    def __init__(self, maze, break_walls_chance, watch=True) -> None:
+        super().__init__(maze, break_walls_chance, watch)
+        self.in_maze = bytearray()
+        self.position = -1
+        self.remaining = 0
+
+    def first_step(self):
+        size = len(self.maze.mask)
+        self.in_maze = bytearray(size)
+        self.position = self.maze.start_index
+        self.in_maze[self.position] = 1
+        self.maze.cells[self.position].visited = True
+        self.remaining = size - 1
+        self._step = self._aldous_broder_step if self.remaining else self._finalize
+
+    def _aldous_broder_step(self):
+        index = self.position
+        dir = maze_utils.random_inbound(self.maze, index)
+        target = index + self.maze.offsets[dir]
+        if self.in_maze[target]:
+            self.maze.set_current_index(target)
+        else:
+            self.in_maze[target] = 1
+            maze_utils.carve_index(self.maze, index, target, dir)
+            self.maze.cells[target].visited = True
+            self.remaining -= 1
+            if not self.remaining:
+                self._step = self._finalize
+        self.position = target
+
+    def _finalize(self):
+        self.maze.clear_current()
+        self._step = None
+
+
+class Wilson(GenBase):
+    """Uniform spanning tree from loop-erased random walks. Each walk starts at the
+    first cell not yet in the maze and wanders until it hits the maze, noting the
+    direction it last left every cell by in walk. Overwriting that byte is all loop
+    erasure takes: following walk from the start only sees the final exit from each
+    cell. break_walls_chance is not applied so the tree stays uniform."""
+
+    visible = True
+    display = "Wilson's"
+    any_topology = True
+
+    def __init__(self, maze, break_walls_chance, watch=True) -> None:
+        super().__init__(maze, break_walls_chance, watch)
+        self.in_maze = bytearray()
+        self.walk = bytearray()
+        self.walk_start = -1
+        self.position = -1
+        self.scan = 0
+
+    def first_step(self):
+        size = len(self.maze.mask)
+        self.in_maze = bytearray(size)
+        self.walk = bytearray(size)
+        self.in_maze[self.maze.start_index] = 1
+        self.maze.cells[self.maze.start_index].visited = True
+        self.scan = 0
+        self._next_walk()
+
+    def _next_walk(self):
+        in_maze, size = self.in_maze, len(self.in_maze)
+        while self.scan < size and in_maze[self.scan]:
+            self.scan += 1
+        if self.scan == size:
+            self.maze.clear_current()
+            self._step = None
+            return
+        self.walk_start = self.position = self.scan
+        self._step = self._wilson_walk
+
+    def _wilson_walk(self):
+        index = self.position
+        dir = maze_utils.random_inbound(self.maze, index)
+        self.walk[index] = dir
+        target = index + self.maze.offsets[dir]
+        self.maze.set_current_index(target)
+        if self.in_maze[target]:
+            self.position = self.walk_start
+            self._step = self._wilson_carve
+        else:
+            self.position = target
+
+    def _wilson_carve(self):
+        """Retrace the loop-erased walk one cell per step, adding it to the maze."""
+        index = self.position
+        dir = self.walk[index]
+        target = index + self.maze.offsets[dir]
+        self.in_maze[index] = 1
+        maze_utils.carve_index(self.maze, index, target, dir)
+        self.position = target
+        if self.in_maze[target]:
+            self._next_walk()
+
+
+class AldousBroderWilson(Wilson, AldousBroder):
+    """Aldous-Broder is quick while most cells are new and Wilson's once most are in the
+    maze, so random walk until coverage of the grid is carved and let Wilson's finish.
+    Note this is only close to uniform: the partial tree the walk leaves behind is not
+    distributed like part of a uniform tree, so use AldousBroder or Wilson where
+    exactness matters."""
+
+    visible = True
+    display = "Aldous-Broder + Wilson's"
+    coverage = 0.3
+
+    def first_step(self):
+        AldousBroder.first_step(self)
+        self.walk = bytearray(len(self.in_maze))
+        self.scan = 0
+
+    def _aldous_broder_step(self):
+        AldousBroder._aldous_broder_step(self)
+        if self.remaining <= len(self.in_maze) * (1 - self.coverage):
+            self._next_walk()
+
+    def _finalize(self):
+        self._next_walk()
+
+
+class GrowingTree(GenBase):
+    """Grows the maze from an active set of cells: pick one by the selection policy,
+    carve to a random new neighbour and make it active, or retire it once it has none.
+    Always taking the newest cell gives the recursive backtracker's long corridors, a
+    random one Prim's short branches and the oldest long straight runs. policy is one of
+    those names or a dict of name -> weight to mix them. Every direction is tried once
+    per cell and a wall into the maze is broken with break_walls_chance."""
+
+    visible = True
+    display = "Growing Tree"
+    any_topology = True
+    policy = {"newest": 1, "random": 1}
+
+    def __init__(self, maze, break_walls_chance, watch=True, policy=None) -> None:
+        super().__init__(maze, break_walls_chance, watch)
+        policy = policy or self.policy
+        if isinstance(policy, str):
+            policy = {policy: 1}
+        self.pickers = []
+        self.weights = []
+        total = 0
+        for name, weight in policy.items():
+            if name not in ("newest", "random", "oldest"):
+                raise ValueError("Unknown growing tree policy {}".format(name))
+            total += weight
+            self.pickers.append(name)
+            self.weights.append(total)
+        self.active = None
+        self.in_maze = bytearray()
+        self.remaining = bytearray()
+
+    def first_step(self):
+        size = len(self.maze.mask)
+        full = self.maze.topology.full
+        self.active = maze_utils.ActiveSet(size)
+        self.in_maze = bytearray(size)
+        self.remaining = bytearray(~edges & full for edges in self.maze.edges)
+        start = self.maze.start_index
+        self.in_maze[start] = 1
+        self.maze.cells[start].visited = True
+        self.active.add(start)
+        self._step = self._grow
+
+    def _pick(self):
+        if len(self.pickers) == 1:
+            name = self.pickers[0]
+        else:
+            roll = maze_utils.glRand.random() * self.weights[-1]
+            for name, weight in zip(self.pickers, self.weights):
+                if roll < weight:
+                    break
+        return getattr(self.active, name)()
+
+    def _grow(self):
+        if not self.active:
+            self.maze.clear_current()
+            self._step = None
+            return
+        index = self._pick()
+        cells, offsets = self.maze.cells, self.maze.offsets
+        topology = self.maze.topology
+        mask = self.remaining[index]
+        while mask:
+            for dir in maze_utils.random_directions(topology):
+                if mask >> dir & 1:
+                    break
+            mask &= ~(1 << dir)
+            target = index + offsets[dir]
+            back = 1 << topology.opposite[dir]
+            if not self.in_maze[target]:
+                self.remaining[index] = mask
+                self.remaining[target] &= ~back
+                self.in_maze[target] = 1
+                maze_utils.carve_index(self.maze, index, target, dir)
+                cells[target].visited = True
+                self.active.add(target)
+                return
+            if self.remaining[target] & back:
+                self.remaining[target] &= ~back
+                if maze_utils.glRand.random() * 100.0 < self.break_walls_chance:
+                    maze_utils.carve_index(self.maze, index, target, dir)
+        self.remaining[index] = 0
+        self.active.remove(index)
+        self.maze.set_current_index(index)
+
+
+class RecursiveDivision(GenBase):
+    """Starts from an open grid and splits it with walls, each with one gap, until every
+    region is a single cell wide. Watching puts up one wall per step; otherwise the
+    walls are written to a wall mask in bulk with NumPy and applied to the cells in one
+    go. break_walls_chance is not applied."""
+
+    visible = True
+    display = "Recursive Division"
+
+    def __init__(self, maze, break_walls_chance, watch=True) -> None:
+        super().__init__(maze, break_walls_chance, watch)
+        self.walls = iter(())
+
+    def first_step(self):
+        self.walls = maze_utils.division_walls(self.maze.x, self.maze.y)
+        if not self.watch:
+            # Imported here so the NumPy import is only paid by bulk generation
+            from . import wallmask
+
+            mask = wallmask.open_grid(self.maze.x, self.maze.y)
+            for wall in self.walls:
+                wallmask.add_wall(mask, *wall)
+            wallmask.open_exits(mask, self.maze)
+            self.maze.set_walls(mask.tobytes())
+            self._step = None
+            return
+        edges = self.maze.edges
+        for index in range(len(edges)):
+            for dir in (DIRECTION.RIGHT.value, DIRECTION.BOTTOM.value):
+                if not edges[index] >> dir & 1:
+                    self.maze.carve(index, dir)
+        self._step = self._divide
+
+    def _divide(self):
+        wall = next(self.walls, None)
+        if wall is None:
+            self.maze.clear_current()
+            self._step = None
+            return
+        horizontal, line, lo, hi, gap = wall
+        for i in range(lo, hi):
+            if i == gap:
+                continue
+            if horizontal:
+                self.maze[i, line].remove_neighbor(DIRECTION.TOP)
+            else:
+                self.maze[line, i].remove_neighbor(DIRECTION.LEFT)
+        if horizontal:
+            self.maze.set_current(gap, line)
+        else:
+            self.maze.set_current(line, gap)
+
+
 class SideWinder(GenBase):
     visible = False
     display = "Side Winder"
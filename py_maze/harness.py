@@ -0,0 +1,347 @@
+"""Differential correctness checks for the generators, solvers and their fast paths.
+
+Every job generates one maze from a fixed seed with the plain unwatched generator, the
+reference, then checks that:
+
+- it is a perfect maze (a spanning tree with every cell reachable) when no walls were
+  broken, otherwise that every cell is still reachable, and after braiding that enough
+  dead ends went;
+- the same seed gives bit-identical walls when stepped one step at a time, when replayed
+  from a recording of that run, and on a grid reused through Maze.reset();
+- the reference breadth first search, distances.distance_matrix and tiled.solve agree on
+  the shortest route length, Depth_First.solve() matches stepping the solver, and every
+  solver's route is a valid walk from start to end, of the shortest length on perfect
+  mazes.
+
+Jobs are plain tuples so run() can farm them out to a process pool."""
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+from . import distances, tiled
+from .maze_obj import Maze
+from .maze_utils import DX, DY, glRand
+from .registry import GENERATORS, SOLVERS
+from .replay import Player, ReplayLog, record_run
+from .topology import cube, hexagonal, square
+
+# Open sides in each mask byte
+_POPCOUNT = tuple(bin(value).count("1") for value in range(256))
+
+
+def make_jobs(generators=None, sizes=(8, 23), seeds=50, break_walls=(0,), braids=(0,)):
+    """(generator display name, x, y, seed, break_walls_chance, braid fraction) for
+    every combination, sizes being square."""
+    names = generators or list(GENERATORS)
+    return [
+        (name, size, size, seed, chance, braid)
+        for name, size, chance, braid, seed in product(
+            names, sizes, break_walls, braids, range(seeds)
+        )
+    ]
+
+
+def _generate(generator, x, y, seed, chance, braid, maze=None, watch=False):
+    glRand.seed(seed)
+    if maze is None:
+        maze = Maze()
+    maze.set_bounds(x, y)
+    _finish(generator(maze, chance, watch))
+    if braid:
+        maze.braid(braid)
+    return maze
+
+
+def _finish(gen):
+    gen.first_step()
+    while gen.not_done():
+        gen.step()
+
+
+def _watched(generator, x, y, seed, chance, braid):
+    """The same run stepped one step at a time while recording it, and that recording
+    played back onto a fresh grid."""
+    glRand.seed(seed)
+    maze = Maze()
+    maze.set_bounds(x, y)
+    log = record_run(generator(maze, chance, True))
+    if braid:
+        maze.record(log)
+        maze.braid(braid)
+        maze.record(None)
+        log.mark_step()
+    player = Player(log)
+    while player.not_done():
+        player.step()
+    return maze, player.maze
+
+
+def _recorded(generator, x, y, seed, chance, braid):
+    """The same run left unwatched while recording it, as MainWindow records with Watch
+    off, played back onto a fresh grid."""
+    glRand.seed(seed)
+    maze = Maze()
+    maze.set_bounds(x, y)
+    log = ReplayLog.from_maze(maze)
+    maze.record(log)
+    _finish(generator(maze, chance, False))
+    if braid:
+        maze.braid(braid)
+    maze.record(None)
+    log.mark_step()
+    player = Player(log)
+    while player.not_done():
+        player.step()
+    return player.maze
+
+
+def _inner(maze, index):
+    return maze.mask[index] & ~maze.edges[index]
+
+
+def _passages(maze):
+    return sum(_POPCOUNT[_inner(maze, index)] for index in range(len(maze.mask))) // 2
+
+
+def reference_distance(maze):
+    """Breadth first search from start to end over the flat arrays, returning the number
+    of steps and how many cells are reachable from the start."""
+    start, end = maze.start_index, maze.end_index
+    distance = {start: 0}
+    queue = deque([start])
+    while queue:
+        index = queue.popleft()
+        open_sides = _inner(maze, index)
+        for dir in range(maze.topology.count):
+            if open_sides >> dir & 1:
+                target = index + maze.offsets[dir]
+                if target not in distance:
+                    distance[target] = distance[index] + 1
+                    queue.append(target)
+    return distance.get(end, -1), len(distance)
+
+
+def _perfect_errors(maze):
+    """Why maze is not a spanning tree of its grid, if it isn't."""
+    size = len(maze.mask)
+    reached = reference_distance(maze)[1]
+    if reached != size:
+        return "{} of {} cells reachable".format(reached, size)
+    loops = _passages(maze) - (size - 1)
+    if loops:
+        return "{} loops in a maze that should be perfect".format(loops)
+    return None
+
+
+def check_topologies(x=6, y=5, levels=3, seed=0):
+    """Moves one grid through every topology and back to set_bounds, generating on each
+    with every generator that can, returning failure messages."""
+    failures = []
+    layouts = (square(x, y), cube(x, y, levels), hexagonal(x, y))
+    for name, generator in GENERATORS.items():
+        for topology in layouts:
+            glRand.seed(seed)
+            maze = Maze()
+            maze.set_topology(topology)
+            if generator.any_topology:
+                _finish(generator(maze, 0, False))
+                error = _perfect_errors(maze)
+                if error:
+                    failures.append("{} on {}: {}".format(name, topology, error))
+            for size in ((x, y), (x + 1, y)):
+                maze.set_bounds(*size)
+                _finish(generator(maze, 0, False))
+                error = _perfect_errors(maze)
+                if error:
+                    failures.append(
+                        "{} on {}x{} after {}: {}".format(name, *size, topology, error)
+                    )
+    return failures
+
+
+def _run_window(window):
+    window.generate_maze()
+    while window.gen.not_done() or window.braid_fraction:
+        window.cont_maker()
+    window.solve_maze()
+    while window.solver.not_done():
+        window.cont_solver()
+
+
+def check_window_recording(generator="Kruskal", size=12):
+    """Generates and solves twice in a MainWindow, recording only the first time, and
+    checks the second run left that recording alone. Needs a QApplication."""
+    # Imported here so the harness itself never loads Qt
+    from .maze import MainWindow
+
+    window = MainWindow()
+    window.watch.setChecked(False)
+    window.gen_algo.setCurrentText(generator)
+    window.x_size.setText(str(size))
+    window.y_size.setText(str(size))
+    window.record.setChecked(True)
+    _run_window(window)
+    log = window.replay
+    length = len(log.events)
+    window.record.setChecked(False)
+    _run_window(window)
+    if len(log.events) != length:
+        return [
+            "an unrecorded run grew the recording from {} to {} events".format(
+                length, len(log.events)
+            )
+        ]
+    return []
+
+
+def _dead_ends(maze):
+    return sum(_POPCOUNT[value] == 1 for value in maze.mask)
+
+
+def _route_errors(maze, route):
+    """Why route is not a walk through open sides from start to end, if it isn't."""
+    if not route:
+        return "empty route"
+    if list(route[0]) != list(maze.start) or list(route[-1]) != list(maze.end):
+        return "route runs {} to {}".format(route[0], route[-1])
+    for (x0, y0), (x1, y1) in zip(route, route[1:]):
+        # All Left lists the cell it turns round in twice
+        if (x0, y0) == (x1, y1):
+            continue
+        for dir in range(4):
+            if (x0 + DX[dir], y0 + DY[dir]) == (x1, y1):
+                break
+        else:
+            return "route jumps {} to {}".format((x0, y0), (x1, y1))
+        if maze.isWall(x0, y0, dir):
+            return "route goes through a wall at {}".format((x0, y0))
+    return None
+
+
+def _loop_erased(route):
+    """Route with every detour back to a cell already on it cut out."""
+    path, seen = [], {}
+    for step in map(tuple, route):
+        if step in seen:
+            del path[seen[step] + 1 :]
+            seen = {cell: i for i, cell in enumerate(path)}
+        else:
+            seen[step] = len(path)
+            path.append(step)
+    return path
+
+
+def _tiled_distance(maze):
+    handle, path = tempfile.mkstemp(suffix=".mzt")
+    os.close(handle)
+    try:
+        tiled.TiledMaze.write(path, maze, tile=16)
+        stored = tiled.TiledMaze(path, cache_tiles=4)
+        try:
+            same = all(
+                stored.store[divmod(index, maze.y)] == value
+                for index, value in enumerate(maze.mask)
+            )
+            return len(tiled.solve(stored)) - 1, same
+        finally:
+            stored.close()
+    finally:
+        os.remove(path)
+
+
+def check(job, use_tiled=True):
+    """Runs every check on one job, returning (job, list of failure messages)."""
+    name, x, y, seed, chance, braid = job
+    generator = GENERATORS[name]
+    failures = []
+
+    def fail(message, *args):
+        failures.append(message.format(*args))
+
+    glRand.seed(seed)
+    maze = Maze()
+    maze.set_bounds(x, y)
+    gen = generator(maze, chance, False)
+    gen.first_step()
+    while gen.not_done():
+        gen.step()
+    dead_before, loops_before = _dead_ends(maze), _passages(maze) - (x * y - 1)
+    if braid:
+        maze.braid(braid)
+
+    # Shape
+    shortest, reached = reference_distance(maze)
+    if reached != x * y:
+        fail("{} of {} cells reachable", reached, x * y)
+    perfect = not chance and not braid
+    if perfect and loops_before:
+        fail("{} loops in a maze that should be perfect", loops_before)
+    if braid:
+        most = dead_before - round(dead_before * braid)
+        if _dead_ends(maze) > most:
+            fail("{} dead ends left by braiding, at most {}", _dead_ends(maze), most)
+
+    # Same seed, same walls
+    watched, replayed = _watched(generator, x, y, seed, chance, braid)
+    if watched.mask != maze.mask:
+        fail("watched walls differ")
+    if replayed.mask != maze.mask:
+        fail("replayed walls differ")
+    if _recorded(generator, x, y, seed, chance, braid).mask != maze.mask:
+        fail("walls replayed from an unwatched recording differ")
+    reused = _generate(generator, x, y, seed + 1, chance, braid)
+    _generate(generator, x, y, seed, chance, braid, maze=reused)
+    if reused.mask != maze.mask:
+        fail("walls differ on a reset grid")
+
+    # Shortest routes
+    matrix = distances.distance_matrix(maze, [maze.start], [maze.end])
+    if matrix[0, 0] != shortest:
+        fail("distance_matrix says {}, reference {}", matrix[0, 0], shortest)
+    if use_tiled:
+        length, same = _tiled_distance(maze)
+        if not same:
+            fail("tiled walls differ")
+        if length != shortest:
+            fail("tiled.solve says {}, reference {}", length, shortest)
+
+    # Solvers
+    for solver_name, solver in SOLVERS.items():
+        try:
+            route = solver(maze, False).solve()
+        except Exception as err:
+            fail("{} raised {!r}", solver_name, err)
+            continue
+        if shortest < 0:
+            if route:
+                fail("{} found a route to an unreachable exit", solver_name)
+            continue
+        error = _route_errors(maze, route)
+        length = len(_loop_erased(route)) - 1
+        if error:
+            fail("{}: {}", solver_name, error)
+        elif perfect and length != shortest:
+            fail("{} route is {} steps, shortest {}", solver_name, length, shortest)
+    depth_first = SOLVERS.get("Depth First")
+    if depth_first is not None:
+        stepped = depth_first(maze, False)
+        stepped.set_up()
+        while stepped.not_done() and not stepped.finished:
+            stepped.step()
+        if stepped.solution() != depth_first(maze, False).solve():
+            fail("Depth First solve() differs from stepping it")
+    return job, failures
+
+
+def _check_job(args):
+    return check(*args)
+
+
+def run(jobs, processes=None, chunksize=8, use_tiled=True):
+    """Checks jobs in a process pool, yielding (job, failures) in order."""
+    with ProcessPoolExecutor(processes) as pool:
+        yield from pool.map(
+            _check_job, ((job, use_tiled) for job in jobs), chunksize=chunksize
+        )
@@ -1,6 +1,412 @@
-from Qt import QtCore, QtWidgets
+import json
+import random
+import time
+from collections import Counter
+from functools import lru_cache
 
-from .maze_obj import GENERATORS, SOLVERS, Cell, Maze
+import numpy as np
+from Qt import QtCore, QtGui, QtWidgets
+
+from .export import render_pixels
+from .maze_obj import Maze
+from .maze_utils import CHECKING_BIT, CLOSED_BIT, CURRENT_BIT, VISITED_BIT
+from .registry import GENERATORS, SOLVERS
+from .replay import Player, ReplayLog
+
+# Generator picked when the window opens, the first in the list before the registry
+DEFAULT_GENERATOR = "Eller's"
+
+
+@lru_cache(maxsize=4096)
+def set_color(seed):
+    """Colour for a cell set, seed being the set id plus the maze's random offset.
+    Shared by every cell so a set's colour is only worked out once while it is on
+    screen."""
+    rand = random.Random(seed)
+    return QtGui.QColor(rand.randrange(255), rand.randrange(255), rand.randrange(255))
+
+
+class MazeTile(QtWidgets.QGraphicsItem):
+    """Paints a square block of cells straight from the maze's arrays, from a cached
+    pixmap once the cells are too small on screen to be worth drawing one by one."""
+
+    size = 32
+    mult = 1.0
+    # Pixels per cell in the cached pixmap
+    pixels = 4
+    # Pixels per cell on screen below which the cached pixmap is drawn
+    lod = 6.0
+
+    # Paint resources shared by every tile
+    _line_w = 0.1 * mult
+    _pen = QtGui.QPen(QtGui.QColor(QtCore.Qt.black), _line_w)
+    _green = QtGui.QColor(QtCore.Qt.green)
+    _overlay = QtGui.QColor(255, 255, 0, 200)
+    _red = QtGui.QColor(QtCore.Qt.red)
+    _pink = QtGui.QColor(255, 150, 203)
+    _white = QtGui.QColor(QtCore.Qt.white)
+    _gray = QtGui.QColor(QtCore.Qt.gray)
+    _tl = QtCore.QPointF(_line_w * 0.5, _line_w * 0.5)
+    _tr = QtCore.QPointF(mult - _line_w * 0.5, _line_w * 0.5)
+    _br = QtCore.QPointF(mult - _line_w * 0.5, mult - _line_w * 0.5)
+    _bl = QtCore.QPointF(_line_w * 0.5, mult - _line_w * 0.5)
+    # Wall line for each direction
+    _walls = (
+        QtCore.QLineF(_tl, _tr),
+        QtCore.QLineF(_tr, _br),
+        QtCore.QLineF(_br, _bl),
+        QtCore.QLineF(_bl, _tl),
+    )
+    _rect = QtCore.QRectF(0, 0, mult, mult)
+
+    def __init__(self, maze, tx, ty):
+        super(MazeTile, self).__init__(None)
+        self.maze = maze
+        self.x0, self.y0 = tx * self.size, ty * self.size
+        self.width = min(self.size, maze.x - self.x0)
+        self.height = min(self.size, maze.y - self.y0)
+        self._pixmap = None
+        # Set from the first change until the next paint, a burst of changes costing
+        # only one update
+        self._dirty = False
+        self.setPos(self.x0 * self.mult, self.y0 * self.mult)
+        self.setZValue(-1)
+
+    def refresh(self):
+        if not self._dirty:
+            self.invalidate()
+            self.update(self.boundingRect())
+
+    def invalidate(self):
+        """Marks the tile stale without asking for an update, for when the whole scene
+        is about to be redrawn anyway."""
+        self._dirty = True
+        self._pixmap = None
+
+    def boundingRect(self):
+        # Room for the pixmap's right and bottom wall lines
+        spill = self.mult / self.pixels
+        return QtCore.QRectF(
+            0, 0, self.width * self.mult + spill, self.height * self.mult + spill
+        )
+
+    def paint(self, painter, option, widget):
+        self._dirty = False
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod * self.mult >= self.lod:
+            self._paint_cells(painter, option.exposedRect)
+            return
+        if self._pixmap is None:
+            self._pixmap = self._render()
+        painter.drawPixmap(
+            self.boundingRect(), self._pixmap, QtCore.QRectF(self._pixmap.rect())
+        )
+
+    def _render(self):
+        """Builds the pixmap with numpy from the tile's slice of the arrays rather than
+        painting it cell by cell, a tile's right and bottom wall lines spilling one
+        pixel past it."""
+        maze = self.maze
+        cells = (
+            slice(self.x0, self.x0 + self.width),
+            slice(self.y0, self.y0 + self.height),
+        )
+        mask = np.frombuffer(maze.mask, dtype=np.uint8).reshape(maze.x, maze.y)[cells]
+        image = render_pixels(mask, self.pixels, colours=self._colours(cells))
+        height, width, _ = image.shape
+        return QtGui.QPixmap.fromImage(
+            QtGui.QImage(
+                image.tobytes(), width, height, width * 3, QtGui.QImage.Format_RGB888
+            )
+        )
+
+    def _colours(self, cells):
+        """Background of each cell as _paint_cell picks it, lowest priority first."""
+        maze = self.maze
+        shape = maze.x, maze.y
+        flags = np.frombuffer(maze.flags, dtype=np.uint8).reshape(shape)[cells]
+        mask = np.frombuffer(maze.mask, dtype=np.uint8).reshape(shape)[cells]
+        sets = np.frombuffer(maze.sets, dtype=np.int32).reshape(shape)[cells]
+        colours = np.empty(flags.shape + (3,), dtype=np.uint8)
+        colours[:] = _rgb(self._white)
+        colours[mask == 0] = _rgb(self._gray)
+        for set_id in np.unique(sets[sets != -1]).tolist():
+            colours[sets == set_id] = _rgb(set_color(set_id + maze.rand))
+        colours[flags & CHECKING_BIT != 0] = _rgb(self._white)
+        colours[flags & VISITED_BIT != 0] = _rgb(self._pink)
+        colours[flags & CLOSED_BIT != 0] = _rgb(self._red)
+        current = flags & CURRENT_BIT != 0
+        if current.any():
+            inc = np.frombuffer(maze.inc, dtype=np.uint8).reshape(shape)[cells]
+            for count in np.unique(inc[current]).tolist():
+                colours[current & (inc == count)] = _current_rgb(count)
+        return colours
+
+    def _paint_cells(self, painter, rect):
+        i0 = max(int(rect.left() / self.mult), 0)
+        j0 = max(int(rect.top() / self.mult), 0)
+        i1 = min(int(rect.right() / self.mult) + 1, self.width)
+        j1 = min(int(rect.bottom() / self.mult) + 1, self.height)
+        for i in range(i0, i1):
+            for j in range(j0, j1):
+                painter.translate(i * self.mult, j * self.mult)
+                self._paint_cell(painter, (self.x0 + i) * self.maze.y + self.y0 + j)
+                painter.translate(-i * self.mult, -j * self.mult)
+
+    def _paint_cell(self, painter, index):
+        maze = self.maze
+        flags, mask = maze.flags[index], maze.mask[index]
+        rect = self._rect
+        if flags & CURRENT_BIT:
+            painter.fillRect(rect, self._green)
+            for _ in range(maze.inc[index]):
+                painter.fillRect(rect, self._overlay)
+        elif flags & CLOSED_BIT:
+            painter.fillRect(rect, self._red)
+        elif flags & VISITED_BIT:
+            painter.fillRect(rect, self._pink)
+        elif flags & CHECKING_BIT:
+            painter.fillRect(rect, self._white)
+        elif maze.sets[index] != -1:
+            painter.fillRect(rect, set_color(maze.sets[index] + maze.rand))
+        elif not mask:
+            painter.fillRect(rect, self._gray)
+        else:
+            painter.fillRect(rect, self._white)
+
+        walls = [line for dir, line in enumerate(self._walls) if not mask >> dir & 1]
+        if walls:
+            painter.setPen(self._pen)
+            painter.drawLines(walls)
+
+
+def _rgb(colour):
+    return colour.getRgb()[:3]
+
+
+@lru_cache(maxsize=256)
+def _current_rgb(count):
+    """Green with the translucent overlay painted over it count times."""
+    colour = np.array(_rgb(MazeTile._green), dtype=float)
+    overlay = MazeTile._overlay
+    alpha = overlay.alpha() / 255.0
+    for _ in range(count):
+        colour = colour * (1 - alpha) + np.array(_rgb(overlay)) * alpha
+    return tuple(int(round(c)) for c in colour)
+
+
+def make_tiles(maze):
+    return [
+        MazeTile(maze, tx, ty)
+        for tx in range(0, (maze.x + MazeTile.size - 1) // MazeTile.size)
+        for ty in range(0, (maze.y + MazeTile.size - 1) // MazeTile.size)
+    ]
+
+
+class MazeView(QtWidgets.QGraphicsView):
+    """Zoomable, draggable view of a maze made of MazeTiles, which the maze tells about
+    every cell that changes."""
+
+    zoom_step = 1.25
+
+    def __init__(self, parent):
+        super(MazeView, self).__init__(parent)
+        self.setDragMode(QtWidgets.QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
+        self.maze = None
+        self.tiles = []
+        self.rows = 0
+        # Told how long every paint takes, see PerfHud
+        self.hud = None
+
+    def set_maze(self, maze):
+        scene = self.scene()
+        for item in self.tiles:
+            scene.removeItem(item)
+        if self.maze is not None and self.maze.view is self:
+            self.maze.view = None
+        self.maze = maze
+        self.tiles = make_tiles(maze)
+        self.rows = (maze.y + MazeTile.size - 1) // MazeTile.size
+        for tile in self.tiles:
+            scene.addItem(tile)
+        maze.view = self
+        scene.setSceneRect(0, 0, maze.x * MazeTile.mult, maze.y * MazeTile.mult)
+        self.fit()
+
+    def cell_changed(self, index):
+        x, y = divmod(index, self.maze.y)
+        self.tiles[x // MazeTile.size * self.rows + y // MazeTile.size].refresh()
+
+    def refresh(self):
+        """Every cell changed, redraw the lot in one scene update, not one per tile."""
+        for tile in self.tiles:
+            tile.invalidate()
+        self.scene().update()
+
+    def fit(self):
+        if self.maze is None:
+            return
+        self.fitInView(
+            QtCore.QRectF(
+                0,
+                0,
+                (self.maze.x + 1) * MazeTile.mult,
+                (self.maze.y + 1) * MazeTile.mult,
+            )
+        )
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        super(MazeView, self).paintEvent(event)
+        if self.hud is not None:
+            self.hud.frame(time.perf_counter() - start)
+
+    def wheelEvent(self, event):
+        factor = self.zoom_step ** (event.angleDelta().y() / 120.0)
+        self.scale(factor, factor)
+
+
+class PerfHud(QtWidgets.QLabel):
+    """Live stats for the running generator, solver or replay: steps per second, frame
+    and render times, cells visited, route length and the current phase (the name of the
+    step method about to run). The text is only rebuilt every interval ms and only while
+    shown, and summary() gives the whole run for saving as JSON."""
+
+    interval = 250
+
+    def __init__(self, parent):
+        super(PerfHud, self).__init__(parent)
+        self.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.update_text)
+        self.track(None, None, "")
+
+    def track(self, runner, maze, kind):
+        """Starts counting for a new run."""
+        self.runner = runner
+        self.maze = maze
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.finished = None
+        self.frames = 0
+        self.frame_total = self.frame_max = 0.0
+        self.render_total = self.render_max = 0.0
+        self.last_frame = None
+        self.phase_steps = Counter()
+        self.phase_time = Counter()
+        self.rate = 0.0
+        self._tick = (self.started, 0)
+
+    def record(self, phase, seconds, steps):
+        self.phase_steps[phase] += steps
+        self.phase_time[phase] += seconds
+
+    def frame(self, render):
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            frame = now - self.last_frame
+            self.frame_total += frame
+            self.frame_max = max(self.frame_max, frame)
+        self.last_frame = now
+        self.frames += 1
+        self.render_total += render
+        self.render_max = max(self.render_max, render)
+
+    def showEvent(self, event):
+        self.timer.start(self.interval)
+        self.update_text()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+
+    def steps(self):
+        return getattr(self.runner, "steps", 0)
+
+    def phase(self):
+        return _phase(self.runner, self.kind)
+
+    def finish(self):
+        """Stops the clock, called as the run completes."""
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def cells_visited(self):
+        if self.maze is None or not self.maze.cells:
+            return 0
+        flags = np.frombuffer(self.maze.flags, dtype=np.uint8)
+        return int(np.count_nonzero(flags & VISITED_BIT))
+
+    def route_length(self):
+        route_length = getattr(self.runner, "route_length", None)
+        return route_length() if route_length is not None else 0
+
+    def frame_times(self):
+        """Mean time between paints and mean time spent painting."""
+        frame = self.frame_total / (self.frames - 1) if self.frames > 1 else 0.0
+        render = self.render_total / self.frames if self.frames else 0.0
+        return frame, render
+
+    def update_text(self):
+        now, steps = time.perf_counter(), self.steps()
+        then, before = self._tick
+        if now > then:
+            self.rate = (steps - before) / (now - then)
+        self._tick = (now, steps)
+        frame, render = self.frame_times()
+        self.setText(
+            "{} {}  {:,} steps  {:,.0f} steps/s  {:.2f} s\n"
+            "frame {:.1f} ms  render {:.1f} ms  visited {:,}  route {:,}".format(
+                self.kind or "idle",
+                self.phase(),
+                steps,
+                self.rate,
+                self.elapsed(),
+                frame * 1000,
+                render * 1000,
+                self.cells_visited(),
+                self.route_length(),
+            )
+        )
+
+    def summary(self):
+        elapsed, steps = self.elapsed(), self.steps()
+        frame, render = self.frame_times()
+        return {
+            "kind": self.kind,
+            "algorithm": getattr(self.runner, "display", "")
+            or type(self.runner).__name__,
+            "size": [self.maze.x, self.maze.y] if self.maze is not None else None,
+            "origin": self.maze.origin if self.maze is not None else None,
+            "watch": getattr(self.runner, "watch", None),
+            "elapsed": elapsed,
+            "steps": steps,
+            "steps_per_second": steps / elapsed if elapsed else 0.0,
+            "frames": self.frames,
+            "frame_time_mean": frame,
+            "frame_time_max": self.frame_max,
+            "render_time_mean": render,
+            "render_time_max": self.render_max,
+            "cells_visited": self.cells_visited(),
+            "route_length": self.route_length(),
+            "phases": {
+                phase: {
+                    "steps": self.phase_steps[phase],
+                    "seconds": self.phase_time[phase],
+                }
+                for phase in self.phase_steps
+            },
+        }
+
+
+def _phase(runner, default):
+    if runner is None or not runner.not_done():
+        return "done"
+    step = getattr(runner, "_step", None)
+    return step.__name__ if step is not None else default
 
 
 class MainWindow(QtWidgets.QWidget):
@@ -12,6 +418,8 @@ class MainWindow(QtWidgets.QWidget):
         self.timer = QtCore.QTimer()
         self.gen = None
         self.solver = None
+        self.replay = None
+        self.braid_fraction = 0
         self.maze = Maze()
 
     def setup_ui(self):
@@ -20,12 +428,16 @@ class MainWindow(QtWidgets.QWidget):
         layout2 = QtWidgets.QHBoxLayout()
         self.g_scene = QtWidgets.QGraphicsScene(self)
         self.g_scene.setBackgroundBrush(QtCore.Qt.white)
-        self.g_view = QtWidgets.QGraphicsView(self)
+        self.g_view = MazeView(self)
         self.g_view.setHorizontalScrollBarPolicy(1)
         self.g_view.setVerticalScrollBarPolicy(1)
         layout.addLayout(layout2)
         layout2.addWidget(self.g_view)
         self.g_view.setScene(self.g_scene)
+        self.hud = PerfHud(self)
+        self.hud.hide()
+        self.g_view.hud = self.hud
+        layout.addWidget(self.hud)
         layout2 = QtWidgets.QHBoxLayout()
         self.watch = QtWidgets.QCheckBox("Watch")
         self.watch.setChecked(True)
@@ -37,7 +449,8 @@ class MainWindow(QtWidgets.QWidget):
         layout.addLayout(layout2)
         layout2 = QtWidgets.QHBoxLayout()
         self.gen_algo = QtWidgets.QComboBox(self)
-        self.gen_algo.addItems([gen[0] for gen in GENERATORS])
+        self.gen_algo.addItems(list(GENERATORS))
+        self.gen_algo.setCurrentText(DEFAULT_GENERATOR)
         layout2.addWidget(self.gen_algo)
         label = QtWidgets.QLabel("X:")
         layout2.addWidget(label)
@@ -51,66 +464,171 @@ class MainWindow(QtWidgets.QWidget):
         layout2.addWidget(label)
         self.break_walls = QtWidgets.QLineEdit("50", self)
         layout2.addWidget(self.break_walls)
+        label = QtWidgets.QLabel("Braid %:")
+        layout2.addWidget(label)
+        self.braid = QtWidgets.QSpinBox(self)
+        self.braid.setRange(0, 100)
+        layout2.addWidget(self.braid)
         self.make_maze_button = QtWidgets.QPushButton("Generate", self)
         layout2.addWidget(self.make_maze_button)
         layout.addLayout(layout2)
         layout2 = QtWidgets.QHBoxLayout()
         self.solve_algo = QtWidgets.QComboBox(self)
-        self.solve_algo.addItems([sol[0] for sol in SOLVERS])
+        self.solve_algo.addItems(list(SOLVERS))
         layout2.addWidget(self.solve_algo)
         self.solve_maze_button = QtWidgets.QPushButton("Solve", self)
         layout2.addWidget(self.solve_maze_button)
         layout.addLayout(layout2)
+        layout2 = QtWidgets.QHBoxLayout()
+        self.record = QtWidgets.QCheckBox("Record")
+        layout2.addWidget(self.record)
+        self.save_replay_button = QtWidgets.QPushButton("Save Replay", self)
+        layout2.addWidget(self.save_replay_button)
+        self.load_replay_button = QtWidgets.QPushButton("Load Replay", self)
+        layout2.addWidget(self.load_replay_button)
+        self.replay_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal, self)
+        self.replay_slider.setEnabled(False)
+        layout2.addWidget(self.replay_slider)
+        self.show_stats = QtWidgets.QCheckBox("Stats")
+        layout2.addWidget(self.show_stats)
+        self.save_stats_button = QtWidgets.QPushButton("Save Stats", self)
+        layout2.addWidget(self.save_stats_button)
+        layout.addLayout(layout2)
 
     def setup_signals(self):
         self.make_maze_button.pressed.connect(self.generate_maze)
         self.solve_maze_button.pressed.connect(self.solve_maze)
         self.watch.stateChanged.connect(self.watch_toggled)
+        self.save_replay_button.pressed.connect(self.save_replay)
+        self.load_replay_button.pressed.connect(self.load_replay)
+        self.replay_slider.valueChanged.connect(self.seek_replay)
+        self.show_stats.stateChanged.connect(self.stats_toggled)
+        self.save_stats_button.pressed.connect(self.save_stats)
 
     def watch_toggled(self, state):
         self.step_time.setEnabled(state)
 
+    def stats_toggled(self, state):
+        self.hud.setVisible(bool(state))
+
+    def show_maze(self):
+        self.g_view.set_maze(self.maze)
+
     def generate_maze(self):
         x = int(self.x_size.text())
         y = int(self.y_size.text())
-        for cell in self.g_scene.items():
-            self.g_scene.removeItem(cell)
+        # A grid of the same size is reset in place and keeps its tiles
+        reuse = self.g_view.maze is self.maze and (x, y) == (self.maze.x, self.maze.y)
         self.maze.set_bounds(x, y)
-        for cell in self.maze.allCells():
-            self.g_scene.addItem(cell)
-        self.g_view.fitInView(
-            QtCore.QRectF(0, 0, (x + 1) * Cell.mult, (y + 1) * Cell.mult)
-        )
-        self.gen = GENERATORS[self.gen_algo.currentIndex()][1](
+        if not reuse:
+            self.show_maze()
+        self.replay_slider.setEnabled(False)
+        # Stop the last recording, if any, so this run is only logged when asked for
+        self.maze.record(None)
+        self.replay = None
+        if self.record.isChecked():
+            self.replay = ReplayLog.from_maze(self.maze)
+            self.maze.record(self.replay)
+        self.gen = GENERATORS[self.gen_algo.currentText()](
             self.maze, int(self.break_walls.text()), self.watch.isChecked()
         )
+        self.braid_fraction = self.braid.value() / 100
+        self.hud.track(self.gen, self.maze, "generate")
         self.gen.first_step()
+        self.mark_replay_step()
         self.timer.singleShot(1, self.cont_maker)
 
     def solve_maze(self):
-        if self.maze.maze is None:
+        if not self.maze.cells:
             return
-        self.solver = SOLVERS[self.solve_algo.currentIndex()][1](
+        self.solver = SOLVERS[self.solve_algo.currentText()](
             self.maze, self.watch.isChecked()
         )
+        self.hud.track(self.solver, self.maze, "solve")
         self.solver.set_up()
+        self.mark_replay_step()
         self.timer.singleShot(1, self.cont_solver)
 
+    def run_step(self, runner):
+        """One step of a generator, solver or replay, timed for the stats under the
+        phase it started in."""
+        phase = _phase(runner, self.hud.kind)
+        steps = runner.steps
+        start = time.perf_counter()
+        runner.step()
+        self.hud.record(phase, time.perf_counter() - start, runner.steps - steps)
+        if not runner.not_done():
+            self.hud.finish()
+
     def cont_maker(self):
         if self.gen.not_done():
-            self.gen.step()
+            self.run_step(self.gen)
+            self.mark_replay_step()
             timer = self.step_time.text() or 0
             self.timer.singleShot(int(timer), self.cont_maker)
+        elif self.braid_fraction:
+            self.maze.braid(self.braid_fraction)
+            self.braid_fraction = 0
+            self.mark_replay_step()
 
     def cont_solver(self):
         if self.solver.not_done() and not self.gen.not_done():
-            self.solver.step()
+            self.run_step(self.solver)
+            self.mark_replay_step()
             timer = self.step_time.text() or 0
             self.timer.singleShot(int(timer), self.cont_solver)
 
-    def resizeEvent(self, event):
-        x = int(self.x_size.text())
-        y = int(self.y_size.text())
-        self.g_view.fitInView(
-            QtCore.QRectF(0, 0, (x + 1) * Cell.mult, (y + 1) * Cell.mult)
+    def mark_replay_step(self):
+        if self.replay is not None and self.maze.cells:
+            self.replay.mark_step()
+        if isinstance(self.gen, Player):
+            self.replay_slider.blockSignals(True)
+            self.replay_slider.setValue(self.gen.position)
+            self.replay_slider.blockSignals(False)
+
+    def save_replay(self):
+        if self.replay is None:
+            return
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save Replay", "", "Maze replays (*.mzr)"
+        )
+        if path:
+            self.replay.save(path)
+
+    def save_stats(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save Stats", "", "Run summaries (*.json)"
+        )
+        if path:
+            with open(path, "w") as f:
+                json.dump(self.hud.summary(), f, indent=2)
+
+    def load_replay(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Load Replay", "", "Maze replays (*.mzr)"
         )
+        if not path:
+            return
+        self.maze.record(None)
+        self.replay = None
+        log = ReplayLog.load(path)
+        self.maze = log.build_maze()
+        self.x_size.setText(str(log.x))
+        self.y_size.setText(str(log.y))
+        self.show_maze()
+        self.gen = Player(log, self.maze)
+        self.hud.track(self.gen, self.maze, "replay")
+        self.braid_fraction = 0
+        self.replay_slider.blockSignals(True)
+        self.replay_slider.setRange(0, self.gen.step_count)
+        self.replay_slider.setValue(0)
+        self.replay_slider.blockSignals(False)
+        self.replay_slider.setEnabled(True)
+        self.timer.singleShot(1, self.cont_maker)
+
+    def seek_replay(self, value):
+        if isinstance(self.gen, Player):
+            self.gen.seek(value)
+
+    def resizeEvent(self, event):
+        self.g_view.fit()
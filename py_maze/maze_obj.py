@@ -1,249 +1,468 @@
-import inspect
-import random
-
-from Qt.QtCore import QPointF, QRectF, Qt
-from Qt.QtGui import QColor, qRgb
-from Qt.QtWidgets import QGraphicsItem
-
-from . import generators, solvers
-from .maze_utils import DIRECTION, glRand, opposite
-
-GENERATORS = [
-    [c.display, c]
-    for _, c in inspect.getmembers(generators, inspect.isclass)
-    if c.__module__ == generators.__name__ and c.visible
-]
-
-SOLVERS = [
-    [c.display, c]
-    for _, c in inspect.getmembers(solvers, inspect.isclass)
-    if c.__module__ == solvers.__name__ and c.visible
-]
-
-
-class Cell(QGraphicsItem):
-    mult = 1.0
-
-    def __init__(self, offset):
-        super(Cell, self).__init__(None)
-        self._neighbors = [None, None, None, None]
-        self._visited = False
-        self._current = False
-        self._checking = False
-        self._closed = False
-        self._set = -1
-        self._inc = 0
-        self._rand = offset
+from array import array
+
+from .maze_utils import (
+    CARVE,
+    CHECK,
+    CHECKING_BIT,
+    CLEAR,
+    CLOSE,
+    CLOSED_BIT,
+    CURRENT,
+    CURRENT_BIT,
+    DIRECTION,
+    SET,
+    VISIT,
+    VISITED_BIT,
+    glRand,
+)
+from .topology import square
+
+# Replay event logged for each state bit
+_FLAG_EVENTS = {
+    VISITED_BIT: VISIT,
+    CURRENT_BIT: CURRENT,
+    CHECKING_BIT: CHECK,
+    CLOSED_BIT: CLOSE,
+}
+
+
+class Cell:
+    """One cell of a Maze. A cell holds nothing but its maze and index, all of its state
+    lives in the maze's arrays, so cells are made on demand and thrown away freely."""
+
+    __slots__ = ("maze", "_index")
+
+    def __init__(self, maze, index) -> None:
+        self.maze = maze
+        self._index = index
+
+    def __eq__(self, other):
+        if isinstance(other, Cell):
+            return self.maze is other.maze and self._index == other._index
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._index)
+
+    @property
+    def index(self):
+        return self._index
 
     @property
     def visited(self):
-        return self._visited
+        return bool(self.maze.flags[self._index] & VISITED_BIT)
 
     @visited.setter
     def visited(self, value):
-        self._visited = value
-        self.update(self.boundingRect())
+        self.maze.set_flag(self._index, VISITED_BIT, value)
 
     @property
     def current(self):
-        return self._current
+        return bool(self.maze.flags[self._index] & CURRENT_BIT)
 
     @current.setter
     def current(self, value):
-        if value and self.current:
-            self._inc += 1
-        else:
-            self._inc = 0
-        self._current = value
-        self.update(self.boundingRect())
+        self.maze.set_flag(self._index, CURRENT_BIT, value)
+
+    @property
+    def checking(self):
+        return bool(self.maze.flags[self._index] & CHECKING_BIT)
+
+    @checking.setter
+    def checking(self, value):
+        self.maze.set_flag(self._index, CHECKING_BIT, value)
 
     @property
     def closed(self):
-        return self._closed
+        return bool(self.maze.flags[self._index] & CLOSED_BIT)
 
     @closed.setter
     def closed(self, value):
-        self._closed = value
-        self.update(self.boundingRect())
+        self.maze.set_flag(self._index, CLOSED_BIT, value)
 
     @property
     def set(self):
-        return self._set
+        return self.maze.sets[self._index]
 
     @set.setter
     def set(self, value):
-        self._set = value
-        self.update(self.boundingRect())
+        self.maze.set_set(self._index, value)
+
+    def changed(self):
+        self.maze.changed(self._index)
 
     @property
     def neighbors(self):
-        return self._neighbors
+        """Cell on each side, None behind a wall and -1 for an exit off the grid."""
+        return [self.neighbor(dir) for dir in range(self.maze.topology.count)]
 
     def neighbor(self, dir):
         if isinstance(dir, DIRECTION):
             dir = dir.value
-        return self._neighbors[dir]
-
-    def __getitem__(self, key):
-        # neighbors, visited, current, checking, closed, set
-        if key == 3:  # checking
-            return self._checking
-        elif key == 4:  # closed
-            return self._checking
-        raise ValueError("Can't access that way")
-
-    def __setitem__(self, key, value):
-        # neighbors, visited, current, checking, closed, set
-        if key == 3:
-            self._checking = value
-            self.update(self.boundingRect())
-        elif key == 4:
-            return self._closed
-        raise ValueError("Can't access that way")
+        maze, index = self.maze, self._index
+        if not maze.mask[index] >> dir & 1:
+            return None
+        if maze.edges[index] >> dir & 1:
+            return -1
+        return Cell(maze, index + maze.offsets[dir])
 
     def add_neighbor(self, cell, direction):
-        self._neighbors[direction.value] = cell
-        self.update(self.boundingRect())
-        cell._neighbors[opposite(direction).value] = self
-        cell.update(cell.boundingRect())
+        self.maze.carve(self._index, direction.value)
+
+    def remove_neighbor(self, direction):
+        """Puts a wall back up on this side."""
+        self.maze.build_wall(self._index, direction.value)
 
     def clear_state(self):
-        self._visited = False
-        self._current = False
-        self._checking = False
-        self._closed = False
-        self._set = -1
-        self.update(self.boundingRect())
-
-    @staticmethod
-    def boundingRect():
-        return QRectF(0, 0, Cell.mult, Cell.mult)
-
-    def paint(self, painter, option, widget):
-        painter.fillRect(option.rect, QColor(0, 0, 0))
-        rect = option.exposedRect
-        if self._current:
-            painter.fillRect(rect, Qt.green)
-            overlay = QColor(Qt.yellow)
-            overlay.setAlpha(200)
-            for _ in range(self._inc):
-                painter.fillRect(rect, overlay)
-        elif self._closed:
-            painter.fillRect(rect, Qt.red)
-        elif self._visited:
-            painter.fillRect(rect, QColor(255, 150, 203))
-        elif self._checking:
-            painter.fillRect(rect, Qt.white)
-        elif self._set != -1:
-            random.seed(self._set + self._rand)
-            setColor = QColor(
-                random.randrange(255), random.randrange(255), random.randrange(255)
-            )
-            painter.fillRect(rect, setColor)
-        elif all(dir is None for dir in self._neighbors):
-            painter.fillRect(rect, Qt.gray)
-        else:
-            painter.fillRect(rect, Qt.white)
-
-        lineW = 0.1 * Cell.mult
-        pen = painter.pen()
-        pen.setColor(QColor(Qt.black))
-        pen.setWidthF(lineW)
-        painter.setPen(pen)
-        tl = QPointF(0 + lineW * 0.5, 0 + lineW * 0.5)
-        tr = QPointF(Cell.mult - lineW * 0.5, 0 + lineW * 0.5)
-        br = QPointF(Cell.mult - lineW * 0.5, Cell.mult - lineW * 0.5)
-        bl = QPointF(0 + lineW * 0.5, Cell.mult - lineW * 0.5)
-
-        if self._neighbors[0] is None:
-            painter.drawLine(tl, tr)
-        if self._neighbors[1] is None:
-            painter.drawLine(tr, br)
-        if self._neighbors[2] is None:
-            painter.drawLine(br, bl)
-        if self._neighbors[3] is None:
-            painter.drawLine(bl, tl)
+        self.maze.clear_state(self._index)
 
     def __repr__(self) -> str:
-        return "<Cell ({}, {}): {}>".format(
-            int(self.pos().x()), int(self.pos().y()), self.set
-        )
+        return "<Cell ({}, {}): {}>".format(*self.maze.position(self._index), self.set)
+
+
+class Cells:
+    """Sequence of a maze's cells, each made when it is asked for."""
+
+    __slots__ = ("maze",)
+
+    def __init__(self, maze) -> None:
+        self.maze = maze
+
+    def __len__(self):
+        return len(self.maze.mask)
+
+    def __getitem__(self, index):
+        return Cell(self.maze, index)
+
+    def __iter__(self):
+        maze = self.maze
+        for index in range(len(maze.mask)):
+            yield Cell(maze, index)
 
 
 class Maze:
+    """The grid and all of its cells' state, held in flat arrays indexed x * height + y:
+    mask has a set bit for every open side (off the grid for an exit), flags the cell
+    state bits, inc how many times in a row a cell was made current and sets each cell's
+    set id."""
+
     def __init__(self):
         self.x = 0
         self.y = 0
-        self.maze = None
         self.start = None
         self.end = None
-        self.start_side = DIRECTION.TOP
-        self.end_side = DIRECTION.BOTTOM
+        # Sides are int directions, DIRECTION values on a square grid
+        self.start_side = DIRECTION.TOP.value
+        self.end_side = DIRECTION.BOTTOM.value
         self.current = []
-
-    @staticmethod
-    def _make_maze(x, y):
-        maze = []
-        offset = glRand.randint(-(2**64), 2**64)
-        for i in range(x):
-            row = []
-            for j in range(y):
-                new = Cell(offset)
-                new.setPos(i * Cell.mult, j * Cell.mult)
-                row.append(new)
-            maze.append(row)
-        return maze
-
-    def set_bounds(self, x, y):
+        self.origin = None
+        # Flat index core, cells are numbered x * height + y on a square grid, see
+        # topology.py for the rest
+        self.topology = None
+        self.levels = 1
+        self.cells = []
+        self.offsets = (0, 0, 0, 0)
+        self.opposite = (2, 3, 0, 1)
+        self.edges = bytearray()
+        self.mask = bytearray()
+        self.flags = bytearray()
+        self.inc = bytearray()
+        self.sets = array("i")
+        self.rand = 0
+        self.start_index = -1
+        self.end_index = -1
+        # Receive every change, see record() and the view's cell_changed()
+        self.log = None
+        self.view = None
+
+    def _make_grid(self, x, y, topology=None):
+        self.topology = topology or square(x, y)
+        size = self.topology.size
         self.x = x
         self.y = y
-        self.maze = self._make_maze(self.x, self.y)
+        self.levels = size // (x * y)
+        self.mask = bytearray(size)
+        self.flags = bytearray(size)
+        self.inc = bytearray(size)
+        self.sets = array("i", [-1]) * size
+        self.current = []
+        # Offsets the set colours so each maze gets its own
+        self.rand = glRand.randint(-(2**64), 2**64)
+        self._make_tables()
+
+    def set_bounds(self, x, y):
+        """Sets up an empty x by y grid, reusing the current one if it is that size."""
+        if self.cells and (x, y) == (self.x, self.y) and self.topology.name == "square":
+            self.reset()
+            return
+        if self.topology is not None and self.topology.name != "square":
+            # Corner exits of another topology don't carry over
+            self.start_side = DIRECTION.TOP.value
+            self.end_side = DIRECTION.BOTTOM.value
+        self._make_grid(x, y)
+        self._open_goals()
+        self.refresh()
+
+    def _open_goals(self):
         self.start = list(self.open_goal(self.start_side))
         self.end = list(self.open_goal(self.end_side))
+        self.start_index = self.index(*self.start)
+        self.end_index = self.index(*self.end)
+
+    def reset(self):
+        """Empties the grid for another run without reallocating it: walls and cell
+        state are cleared with one bulk write per array and fresh goals opened, drawing
+        the same random numbers set_bounds would so seeded runs come out alike either
+        way."""
+        self.mask[:] = bytes(len(self.mask))
+        self._clear_arrays()
+        self.origin = None
+        self.rand = glRand.randint(-(2**64), 2**64)
+        if self.topology.name == "square":
+            self._open_goals()
+        else:
+            self._open_corners()
+        self.refresh()
+
+    def _clear_arrays(self):
+        size = len(self.mask)
+        zeros = bytes(size)
+        self.flags[:] = zeros
+        self.inc[:] = zeros
+        self.sets[:] = array("i", [-1]) * size
+        self.current = []
+
+    def _make_tables(self):
+        """Builds the cell sequence plus the topology's per direction index offsets and
+        a mask per cell of the directions that lead off the grid."""
+        self.cells = Cells(self)
+        self.offsets = self.topology.offsets
+        self.opposite = self.topology.opposite
+        self.edges = self.topology.edges()
+
+    def set_topology(self, topology):
+        """Sets up an empty grid of any topology, x and y being the last two axes. It is
+        entered through the first cell and left through the last, each opened on its
+        first side leading off the grid, preferring to leave opposite the entrance."""
+        self._make_grid(*topology.shape[-2:], topology=topology)
+        self._open_corners()
+        self.refresh()
+
+    def _open_corners(self):
+        topology = self.topology
+        self.start_index = 0
+        self.end_index = topology.size - 1
+        self.start_side = _first_bit(self.edges[self.start_index])
+        self.end_side = topology.opposite[self.start_side]
+        if not self.edges[self.end_index] >> self.end_side & 1:
+            self.end_side = _first_bit(self.edges[self.end_index])
+        self.mask[self.start_index] |= 1 << self.start_side
+        self.mask[self.end_index] |= 1 << self.end_side
+        self.start = list(topology.coords(self.start_index))
+        self.end = list(topology.coords(self.end_index))
+
+    @classmethod
+    def from_walls(cls, data, x, y, start, end, start_side, end_side, origin=None):
+        """Rebuilds a maze from the packed bytes produced by walls()."""
+        maze = cls()
+        maze._make_grid(x, y)
+        maze.start = list(start)
+        maze.end = list(end)
+        maze.start_side = start_side
+        maze.end_side = end_side
+        maze.origin = origin
+        maze.start_index = maze.index(*maze.start)
+        maze.end_index = maze.index(*maze.end)
+        maze.set_walls(data)
+        return maze
+
+    def set_walls(self, data):
+        """Sets every cell's walls from packed bytes laid out like walls(), open sides
+        leading off the grid becoming exits. While recording, each wall that changes is
+        logged as carve() or build_wall() would log it."""
+        if self.log is not None:
+            self._log_walls(data)
+        self.mask[:] = data
+        self.refresh()
+
+    def _log_walls(self, data):
+        edges, offsets = self.edges, self.offsets
+        for index, (old, new) in enumerate(zip(self.mask, data)):
+            changed = old ^ new
+            for dir in range(self.topology.count):
+                # A wall between two cells is logged once, from the lower index
+                inner = not edges[index] >> dir & 1
+                if changed >> dir & 1 and not (inner and offsets[dir] < 0):
+                    self.log.log(CARVE, index, dir if new >> dir & 1 else dir | 4)
+
+    def walls(self):
+        """Packs the grid into one byte per cell at index x * height + y, a set bit
+        being an open side."""
+        return bytearray(self.mask)
+
+    def changed(self, index):
+        if self.view is not None:
+            self.view.cell_changed(index)
+
+    def refresh(self):
+        """Tells the view every cell changed."""
+        if self.view is not None:
+            self.view.refresh()
+
+    def carve(self, index, dir):
+        """Knocks down the wall on side dir of index and the facing side beyond it."""
+        self.mask[index] |= 1 << dir
+        if self.log is not None:
+            self.log.log(CARVE, index, dir)
+        self.changed(index)
+        if not self.edges[index] >> dir & 1:
+            target = index + self.offsets[dir]
+            self.mask[target] |= 1 << self.opposite[dir]
+            self.changed(target)
+
+    def build_wall(self, index, dir):
+        """Puts the wall on side dir of index back up, logged as a carve with the wall
+        bit (4) set."""
+        self.mask[index] &= ~(1 << dir)
+        if self.log is not None:
+            self.log.log(CARVE, index, dir | 4)
+        self.changed(index)
+        if not self.edges[index] >> dir & 1:
+            target = index + self.offsets[dir]
+            self.mask[target] &= ~(1 << self.opposite[dir])
+            self.changed(target)
+
+    def set_flag(self, index, flag, value):
+        flags = self.flags[index]
+        if flag == CURRENT_BIT:
+            if value and flags & CURRENT_BIT:
+                self.inc[index] = min(self.inc[index] + 1, 255)
+            else:
+                self.inc[index] = 0
+        self.flags[index] = flags | flag if value else flags & ~flag
+        if self.log is not None:
+            self.log.log(_FLAG_EVENTS[flag], index, value)
+        self.changed(index)
+
+    def set_set(self, index, value):
+        self.sets[index] = value
+        if self.log is not None:
+            self.log.log(SET, index, value)
+        self.changed(index)
+
+    def clear_state(self, index):
+        self.flags[index] = 0
+        self.inc[index] = 0
+        self.sets[index] = -1
+        if self.log is not None:
+            self.log.log(CLEAR, index, 0)
+        self.changed(index)
+
+    def clear_states(self):
+        """clear_state() on every cell at once, with a single view refresh. Each cell is
+        still logged while recording so replays see the same events."""
+        self._clear_arrays()
+        if self.log is not None:
+            for index in range(len(self.mask)):
+                self.log.log(CLEAR, index, 0)
+        self.refresh()
+
+    def braid(self, fraction):
+        """Opens a wall in fraction of the dead ends after any generator has run, see
+        wallmask.braid. Only the cells it opens are touched."""
+        self._need_square("braid()")
+        # NumPy stays out of the core import until something braids
+        from . import wallmask
+
+        mask = wallmask.from_bytes(self.mask, self.x, self.y)
+        for index, dir in wallmask.braid(mask, fraction):
+            self.carve(index, dir)
+
+    def packed(self):
+        """Everything from_walls() needs to rebuild this maze in another process."""
+        return (
+            self.walls(),
+            self.x,
+            self.y,
+            self.start,
+            self.end,
+            self.start_side,
+            self.end_side,
+            self.origin,
+        )
+
+    def record(self, log):
+        """Sends every change made to the cells to log, None stops recording."""
+        self.log = log
 
     def open_goal(self, wall):
         # find the y side opening cell
-        if wall.value % 2:
+        if wall % 2:
             value = glRand.randint(0, self.y - 1)
         # find the x side opening cell
         else:
             value = glRand.randint(0, self.x - 1)
 
-        if wall == DIRECTION.TOP:
+        if wall == DIRECTION.TOP.value:
             x = value
             y = 0
-        elif wall == DIRECTION.RIGHT:
+        elif wall == DIRECTION.RIGHT.value:
             x = self.x - 1
             y = value
-        elif wall == DIRECTION.BOTTOM:
+        elif wall == DIRECTION.BOTTOM.value:
             x = value
             y = self.y - 1
-        elif wall == DIRECTION.LEFT:
+        elif wall == DIRECTION.LEFT.value:
             x = 0
             y = value
 
-        self.maze[x][y]._neighbors[wall.value] = -1
+        self.mask[self.index(x, y)] |= 1 << wall
         return x, y
 
+    def _need_square(self, what):
+        if self.topology is not None and self.topology.name != "square":
+            raise ValueError(
+                "{} needs a square grid, not {}".format(what, self.topology.name)
+            )
+
     def __getitem__(self, pos):
+        self._need_square("maze[x, y]")
         if len(pos) == 2:
-            return self.maze[pos[0]][pos[1]]
+            return Cell(self, pos[0] * self.y + pos[1])
 
     def out_of_bounds(self, x, y):
         """Checks if indices are out of bounds."""
         return x < 0 or x >= self.x or y < 0 or y >= self.y
 
+    def index(self, x, y):
+        return x * self.y + y
+
+    def position(self, index):
+        """(x, y) of index, or the topology's coordinates when it has over two axes."""
+        return self.topology.coords(index)
+
+    def step_index(self, index, dir):
+        """Index of the cell beside index in direction dir, -1 when off the grid."""
+        if self.edges[index] >> dir & 1:
+            return -1
+        return index + self.offsets[dir]
+
     def is_start_or_end(self, x, y):
-        return [x, y] in (self.start, self.end)
+        return (x == self.start[0] and y == self.start[1]) or (
+            x == self.end[0] and y == self.end[1]
+        )
 
     def pos_is_unreached(self, x, y):
-        return all(n in (None, -1) for n in self.maze[x][y].neighbors)
+        return self.index_is_unreached(x * self.y + y)
+
+    def index_is_unreached(self, index):
+        return not self.mask[index] & ~self.edges[index]
 
     def isVisited(self, x, y):
-        return self.maze[x][y].visited
+        return bool(self.flags[x * self.y + y] & VISITED_BIT)
 
     def isWall(self, x, y, direction):
-        return self.maze[x][y].neighbors[direction] is None
+        return not self.mask[x * self.y + y] >> direction & 1
 
     def cellsBetween(self, sX, sY, dX, dY):
         if sX < dX:
@@ -263,24 +482,22 @@ class Maze:
                 yield x, y
 
     def allCells(self):
-        if self.maze is None:
-            return []
-        for x in range(0, self.x):
-            for y in range(0, self.y):
-                yield self[x, y]
+        return iter(self.cells)
 
     def set_current(self, x, y, append=False):
-        currentCell = self.maze[x][y]
-        if append:
-            self.current.append(currentCell)
-        else:
+        self.set_current_index(x * self.y + y, append)
+
+    def set_current_index(self, index, append=False):
+        if not append:
             self.clear_current()
-            self.current = [
-                currentCell,
-            ]
-        currentCell.current = True
+        self.current.append(index)
+        self.set_flag(index, CURRENT_BIT, True)
 
     def clear_current(self):
-        for cell in self.current:
-            cell.current = False
-        self.current = []
+        for index in self.current:
+            self.set_flag(index, CURRENT_BIT, False)
+        self.current.clear()
+
+
+def _first_bit(mask):
+    return (mask & -mask).bit_length() - 1
@@ -1,6 +1,7 @@
 import random
+from array import array
 from enum import Enum
-from time import time
+from itertools import permutations
 
 glRand = random.Random()
 
@@ -12,60 +13,99 @@ class DIRECTION(Enum):
     LEFT = 3
 
 
+# Int direction fast path: index these rather than build DIRECTION members each step
+DIRECTIONS = tuple(DIRECTION)
+OPPOSITE = (2, 3, 0, 1)
+DX = (0, 1, 0, -1)
+DY = (-1, 0, 1, 0)
+# Every ordering of the four directions, index with a random number to skip a shuffle
+PERMUTATIONS = tuple(permutations(range(4)))
+# Directions that stay on the grid for each Maze.edges mask
+INBOUND = tuple(tuple(d for d in range(4) if not mask >> d & 1) for mask in range(16))
+
+# Replay log event codes, see replay.py
+CARVE, VISIT, CLOSE, SET, CURRENT, CHECK, CLEAR, STEP = range(8)
+# Cell state bits in Maze.flags
+VISITED_BIT, CURRENT_BIT, CHECKING_BIT, CLOSED_BIT = 1, 2, 4, 8
+
+
 def carve_path(maze, x0, y0, x1, y1, dir):  # _carve_path
+    if dir.__class__ is not int:
+        dir = dir.value
+    carve_index(maze, x0 * maze.y + y0, x1 * maze.y + y1, dir)
+
+
+def carve_index(maze, index, target, dir):
     maze.clear_current()
-    maze.set_current(x1, y1)
-    maze[x0, y0].add_neighbor(maze[x1, y1], dir)
-    maze[x0, y0].visited = True
+    maze.set_current_index(target)
+    maze.carve(index, dir)
+    maze.set_flag(index, VISITED_BIT, True)
 
 
 def create_walk(maze, x, y, dir, break_walls_chance=0, do_carve=True):  # _create_walk
-    tx, ty = take_step(dir, x, y)
-
-    if maze.is_start_or_end(tx, ty):
-        if do_carve:
-            carve_path(maze, x, y, tx, ty, dir)
+    if dir.__class__ is not int:
+        dir = dir.value
+    target = walk_index(maze, x * maze.y + y, dir, break_walls_chance, do_carve)
+    if target < 0:
         return None, None
+    return divmod(target, maze.y)
 
-    if not maze.out_of_bounds(tx, ty):
-        if maze.pos_is_unreached(tx, ty):
-            if do_carve:
-                carve_path(maze, x, y, tx, ty, dir)
-            return tx, ty
-        else:
-            if (glRand.random() * 100.0) < break_walls_chance:
-                carve_path(maze, x, y, tx, ty, dir)
-    return None, None
+
+def walk_index(maze, index, dir, break_walls_chance=0, do_carve=True):
+    """create_walk on flat indices and int directions, -1 instead of (None, None)."""
+    # Walking off the grid, the start and end cells are always in bounds
+    if maze.edges[index] >> dir & 1:
+        return -1
+    target = index + maze.offsets[dir]
+
+    # The start and end are only ever joined on once, and never walked on from
+    if target == maze.start_index or target == maze.end_index:
+        if do_carve and maze.index_is_unreached(target):
+            carve_index(maze, index, target, dir)
+        return -1
+
+    if maze.index_is_unreached(target):
+        if do_carve:
+            carve_index(maze, index, target, dir)
+        return target
+    elif (glRand.random() * 100.0) < break_walls_chance:
+        carve_index(maze, index, target, dir)
+    return -1
 
 
 def take_step(dir, x, y, opposite=False):  # _dir
-    step = 1
-    if isinstance(dir, int):
-        dir = DIRECTION(dir)
+    if dir.__class__ is not int:
+        dir = dir.value
     if opposite:
-        dir = opposite(dir)
-    if dir == DIRECTION.TOP:
-        return x, y - step
-    elif dir == DIRECTION.RIGHT:
-        return x + step, y
-    elif dir == DIRECTION.BOTTOM:
-        return x, y + step
-    elif dir == DIRECTION.LEFT:
-        return x - step, y
-    return x, y
+        dir = OPPOSITE[dir]
+    return x + DX[dir], y + DY[dir]
 
 
 def make_direction_list():  # _random
-    # random.seed(time())
-    dirs = [0, 1, 2, 3]
+    dirs = list(DIRECTIONS)
     glRand.shuffle(dirs)
-    return [DIRECTION(dir) for dir in dirs]
+    return dirs
+
+
+def random_directions(topology=None):
+    """Random ordering of the int directions without allocating, the square grid's four
+    unless a topology is given."""
+    if topology is None:
+        return PERMUTATIONS[glRand.randrange(24)]
+    orders = topology.permutations
+    return orders[glRand.randrange(len(orders))]
+
+
+def random_inbound(maze, index):
+    """Random int direction from index that stays on the grid."""
+    dirs = maze.topology.inbound[maze.edges[index]]
+    return dirs[glRand.randrange(len(dirs))]
 
 
 def opposite(dir):
-    if isinstance(dir, DIRECTION):
+    if dir.__class__ is not int:
         dir = dir.value
-    return DIRECTION((dir + 2) % 4)
+    return DIRECTIONS[OPPOSITE[dir]]
 
 
 def combine_sets(sets, cell1, cell2, dir):
@@ -91,6 +131,86 @@ def combine_sets(sets, cell1, cell2, dir):
     cell1.add_neighbor(cell2, dir)
 
 
+def division_walls(x, y):
+    """Yields the walls recursive division adds to an open x by y grid as (horizontal,
+    line, lo, hi, gap). A horizontal wall runs along the top of row line from column lo
+    up to hi, a vertical one down the left of column line from row lo up to hi, leaving
+    gap open. Works through an explicit region stack instead of recursing."""
+    regions = [(0, 0, x, y)]
+    while regions:
+        rx, ry, w, h = regions.pop()
+        if w < 2 or h < 2:
+            continue
+        if w < h or (w == h and glRand.getrandbits(1)):
+            line = ry + glRand.randint(1, h - 1)
+            yield True, line, rx, rx + w, rx + glRand.randrange(w)
+            regions.append((rx, ry, w, line - ry))
+            regions.append((rx, line, w, ry + h - line))
+        else:
+            line = rx + glRand.randint(1, w - 1)
+            yield False, line, ry, ry + h, ry + glRand.randrange(h)
+            regions.append((rx, ry, line - rx, h))
+            regions.append((line, ry, rx + w - line, h))
+
+
+class ActiveSet:
+    """Cell indices in insertion order with O(1) newest, oldest and random picks and
+    O(1) removal of any member. Order is a doubly linked list threaded through per cell
+    prev/next arrays, random picks come from a dense members array whose slot map lets
+    removal swap the last member into the hole."""
+
+    def __init__(self, size):
+        self.prev = array("i", [-1]) * size
+        self.next = array("i", [-1]) * size
+        self.slot = array("i", [-1]) * size
+        self.members = array("i")
+        self.head = -1
+        self.tail = -1
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, index):
+        return self.slot[index] >= 0
+
+    def add(self, index):
+        self.slot[index] = len(self.members)
+        self.members.append(index)
+        self.prev[index] = self.tail
+        self.next[index] = -1
+        if self.tail >= 0:
+            self.next[self.tail] = index
+        else:
+            self.head = index
+        self.tail = index
+
+    def remove(self, index):
+        slot = self.slot[index]
+        last = self.members.pop()
+        if last != index:
+            self.members[slot] = last
+            self.slot[last] = slot
+        self.slot[index] = -1
+        prev, next = self.prev[index], self.next[index]
+        if prev >= 0:
+            self.next[prev] = next
+        else:
+            self.head = next
+        if next >= 0:
+            self.prev[next] = prev
+        else:
+            self.tail = prev
+
+    def newest(self):
+        return self.tail
+
+    def oldest(self):
+        return self.head
+
+    def random(self):
+        return self.members[glRand.randrange(len(self.members))]
+
+
 class TreeNode:
     def __init__(self, cell, pos) -> None:
         self.parent = None
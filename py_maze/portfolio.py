@@ -0,0 +1,96 @@
+import multiprocessing
+import queue
+import time
+from collections import Counter, defaultdict
+from multiprocessing import shared_memory
+
+from .maze_obj import Maze
+from .registry import SOLVERS
+
+# maze shape -> Counter of solver display names that finished first
+WINS = defaultdict(Counter)
+
+
+def maze_shape(maze):
+    """Key the win record on what makes solvers behave differently: the generator and
+    its break walls chance plus the size of the grid."""
+    return maze.origin, maze.x, maze.y
+
+
+def preferred_solver(shape):
+    """Returns the solver class that has won the most races for this shape, if any."""
+    wins = WINS.get(shape)
+    if not wins:
+        return None
+    return SOLVERS.get(wins.most_common(1)[0][0])
+
+
+def _race(index, solver, shm_name, size, layout, results):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        maze = Maze.from_walls(bytes(shm.buf[:size]), *layout)
+    finally:
+        shm.close()
+    try:
+        route = solver(maze, False).solve()
+    except Exception as err:
+        results.put((index, None, repr(err)))
+    else:
+        results.put((index, route, None))
+
+
+def solve_portfolio(maze, solvers=None, shape=None, timeout=None, context=None):
+    """Races several solvers against the same maze in worker processes. The packed walls
+    are shared read-only through shared memory, each worker rebuilding its own scratch
+    grid from them. The first route to come back wins and the remaining workers are
+    terminated.
+
+    Returns (solver, route), or (None, None) if every solver failed, found no route or
+    the timeout expired.
+    """
+    if not maze.cells:
+        raise ValueError("Maze has not been generated")
+    if solvers is None:
+        solvers = list(SOLVERS.values())
+    if shape is None:
+        shape = maze_shape(maze)
+    context = context or multiprocessing.get_context()
+
+    data, *layout = maze.packed()
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    shm.buf[: len(data)] = data
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=_race,
+            args=(i, solver, shm.name, len(data), layout, results),
+            daemon=True,
+        )
+        for i, solver in enumerate(solvers)
+    ]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        for worker in workers:
+            worker.start()
+        for _ in workers:
+            remaining = (
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+            try:
+                index, route, _err = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            # An empty route means that solver found the exit unreachable
+            if route:
+                winner = solvers[index]
+                WINS[shape][winner.display] += 1
+                return winner, route
+        return None, None
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        results.close()
+        shm.close()
+        shm.unlink()
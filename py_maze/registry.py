@@ -0,0 +1,95 @@
+"""Display name -> class registries for the generators and solvers.
+
+Nothing is imported until a registry is first used. Besides the built-ins, third party
+packages can add their own classes through the "py_maze.generators" and
+"py_maze.solvers" entry point groups, for example in their pyproject.toml:
+
+    [project.entry-points."py_maze.generators"]
+    spiral = "my_package.mazes:Spiral"
+"""
+import importlib
+import warnings
+from collections.abc import Mapping
+
+
+class Registry(Mapping):
+    """Maps display names to classes, built from the built-in "module:Class" paths plus
+    the entry point group the first time it is looked at."""
+
+    def __init__(self, group, builtins) -> None:
+        self.group = group
+        self.builtins = builtins
+        self._classes = None
+
+    def _load(self):
+        if self._classes is not None:
+            return self._classes
+        # Filled in locally so a failed load leaves nothing half built behind
+        classes = {}
+        for path in self.builtins:
+            module, _, name = path.partition(":")
+            _add(classes, getattr(importlib.import_module(module, __package__), name))
+        for entry_point in _entry_points(self.group):
+            try:
+                cls = entry_point.load()
+            except Exception as err:
+                warnings.warn(
+                    "Could not load {} plugin {!r}: {}".format(
+                        self.group, entry_point.name, err
+                    )
+                )
+                continue
+            _add(classes, cls, entry_point.name)
+        self._classes = classes
+        return classes
+
+    def register(self, cls, name=None):
+        """Adds cls under its display name, falling back to name. Returns cls so it can
+        be used as a decorator."""
+        _add(self._load(), cls, name)
+        return cls
+
+    def __getitem__(self, name):
+        return self._load()[name]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+def _add(classes, cls, name=None):
+    classes[getattr(cls, "display", "") or name or cls.__name__] = cls
+
+
+def _entry_points(group):
+    # Imported here, importlib.metadata is one of the slower parts of a cold start
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        return found.select(group=group)
+    # Python 3.9 returns a dict of groups
+    return found.get(group, [])
+
+
+GENERATORS = Registry(
+    "py_maze.generators",
+    [
+        ".generators:AldousBroder",
+        ".generators:AldousBroderWilson",
+        ".generators:Eller",
+        ".generators:GrowingTree",
+        ".generators:HuntAndKill",
+        ".generators:Kruskal",
+        ".generators:RecursiveDivision",
+        ".generators:RecursiveGenerator",
+        ".generators:Wilson",
+    ],
+)
+
+SOLVERS = Registry(
+    "py_maze.solvers",
+    [".solvers:A_Star", ".solvers:All_Left", ".solvers:Depth_First"],
+)
@@ -0,0 +1,287 @@
+import struct
+import sys
+from array import array
+
+from .generators import GenBase
+from .maze_obj import Maze
+from .maze_utils import (
+    CARVE,
+    CHECK,
+    CHECKING_BIT,
+    CLEAR,
+    CLOSE,
+    CLOSED_BIT,
+    CURRENT,
+    CURRENT_BIT,
+    SET,
+    STEP,
+    VISIT,
+    VISITED_BIT,
+)
+
+# Every event is two int32 words: (cell index << 3 | code, value). A CARVE value with
+# bit 4 set puts a wall up rather than knocking one down.
+_CODE_BITS = 3
+_CODE_MASK = (1 << _CODE_BITS) - 1
+_MAGIC = b"PYMZREPL"
+_HEADER = struct.Struct("<8sIIiiiiBBIQ")
+# Maze.flags bit each state event sets or clears
+_FLAG_BITS = {
+    VISIT: VISITED_BIT,
+    CLOSE: CLOSED_BIT,
+    CURRENT: CURRENT_BIT,
+    CHECK: CHECKING_BIT,
+}
+
+
+class ReplayLog:
+    """Compact log of every change a generator or solver made to a maze, one step marker
+    after each of its steps. Starts from a snapshot of the walls so solves can be
+    recorded too."""
+
+    def __init__(self, x, y, start, end, start_side, end_side, walls, events=None):
+        self.x = x
+        self.y = y
+        self.start = list(start)
+        self.end = list(end)
+        self.start_side = start_side
+        self.end_side = end_side
+        self.walls = bytes(walls)
+        self.events = events if events is not None else array("i")
+        self.steps = sum(1 for code in self.events[::2] if code & _CODE_MASK == STEP)
+
+    @classmethod
+    def from_maze(cls, maze):
+        return cls(
+            maze.x,
+            maze.y,
+            maze.start,
+            maze.end,
+            maze.start_side,
+            maze.end_side,
+            maze.walls(),
+        )
+
+    def log(self, code, index, value):
+        self.events.append(index << _CODE_BITS | code)
+        self.events.append(int(value))
+
+    def mark_step(self):
+        self.log(STEP, 0, 0)
+        self.steps += 1
+
+    def __iter__(self):
+        events = self.events
+        for i in range(0, len(events), 2):
+            yield events[i] & _CODE_MASK, events[i] >> _CODE_BITS, events[i + 1]
+
+    def build_maze(self):
+        """A maze in the state the log starts from."""
+        return Maze.from_walls(
+            self.walls,
+            self.x,
+            self.y,
+            self.start,
+            self.end,
+            self.start_side,
+            self.end_side,
+        )
+
+    def save(self, path):
+        events = array("i", self.events)
+        if sys.byteorder == "big":
+            events.byteswap()
+        with open(path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    self.x,
+                    self.y,
+                    *self.start,
+                    *self.end,
+                    self.start_side,
+                    self.end_side,
+                    self.steps,
+                    len(events),
+                )
+            )
+            f.write(self.walls)
+            events.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+            magic, x, y, sx, sy, ex, ey, start_side, end_side, _, count = header
+            if magic != _MAGIC:
+                raise ValueError("{} is not a maze replay".format(path))
+            walls = f.read(x * y)
+            events = array("i")
+            events.fromfile(f, count)
+        if sys.byteorder == "big":
+            events.byteswap()
+        return cls(
+            x,
+            y,
+            (sx, sy),
+            (ex, ey),
+            start_side,
+            end_side,
+            walls,
+            events,
+        )
+
+
+def record_run(runner, log=None):
+    """Runs a generator or solver headlessly at full speed, recording it into log (a new
+    one unless given, so a solve can be appended to its maze's generation)."""
+    maze = runner.maze
+    if log is None:
+        log = ReplayLog.from_maze(maze)
+    watch = runner.watch
+    runner.watch = True
+    maze.record(log)
+    try:
+        if isinstance(runner, GenBase):
+            runner.first_step()
+        else:
+            runner.set_up()
+        log.mark_step()
+        while runner.not_done():
+            runner.step()
+            log.mark_step()
+    finally:
+        maze.record(None)
+        runner.watch = watch
+    return log
+
+
+class _State:
+    """Headless mirror of the cell state a log touches, used to build keyframes."""
+
+    def __init__(self, walls, height):
+        size = len(walls)
+        self.offsets = (-1, height, 1, -height)
+        self.walls = bytearray(walls)
+        self.flags = bytearray(size)
+        self.sets = array("i", [-1]) * size
+
+    def copy(self):
+        state = _State.__new__(_State)
+        state.offsets = self.offsets
+        state.walls = bytearray(self.walls)
+        state.flags = bytearray(self.flags)
+        state.sets = array("i", self.sets)
+        return state
+
+    def apply(self, code, index, value):
+        if code == CARVE and value & 4:
+            value &= 3
+            self.walls[index] &= ~(1 << value)
+            self.walls[index + self.offsets[value]] &= ~(1 << ((value + 2) % 4))
+        elif code == CARVE:
+            self.walls[index] |= 1 << value
+            self.walls[index + self.offsets[value]] |= 1 << ((value + 2) % 4)
+        elif code in _FLAG_BITS:
+            if value:
+                self.flags[index] |= _FLAG_BITS[code]
+            else:
+                self.flags[index] &= ~_FLAG_BITS[code]
+        elif code == SET:
+            self.sets[index] = value
+        elif code == CLEAR:
+            self.flags[index] = 0
+            self.sets[index] = -1
+
+
+class Player:
+    """Plays a ReplayLog back onto a maze through the same first_step/step/not_done
+    protocol as the generators, speed steps at a time, and can seek to any step through
+    keyframes."""
+
+    def __init__(self, log, maze=None, speed=1, keyframe_every=None):
+        self.log = log
+        self.maze = maze if maze is not None else log.build_maze()
+        self.speed = speed
+        self.watch = True
+        self.position = 0
+        # Event offset each step ends at, a trailing unmarked run being a last step
+        self._bounds = [0]
+        for i, (code, _, _) in enumerate(log):
+            if code == STEP:
+                self._bounds.append(i + 1)
+        total = len(log.events) // 2
+        if total != self._bounds[-1]:
+            self._bounds.append(total)
+        self.step_count = len(self._bounds) - 1
+        self.keyframe_every = keyframe_every or max(self.step_count // 32, 1)
+        self._keyframes = self._make_keyframes()
+
+    def _events(self, start, stop):
+        events = self.log.events
+        for i in range(start * 2, stop * 2, 2):
+            yield events[i] & _CODE_MASK, events[i] >> _CODE_BITS, events[i + 1]
+
+    def _make_keyframes(self):
+        state = _State(self.log.walls, self.log.y)
+        keyframes = {0: state.copy()}
+        for step in range(1, self.step_count + 1):
+            for event in self._events(self._bounds[step - 1], self._bounds[step]):
+                state.apply(*event)
+            if not step % self.keyframe_every:
+                keyframes[step] = state.copy()
+        return keyframes
+
+    def _apply(self, code, index, value):
+        maze = self.maze
+        if code == CARVE and value & 4:
+            maze.build_wall(index, value & 3)
+        elif code == CARVE:
+            maze.carve(index, value)
+        elif code in _FLAG_BITS:
+            maze.set_flag(index, _FLAG_BITS[code], value)
+        elif code == SET:
+            maze.set_set(index, value)
+        elif code == CLEAR:
+            maze.clear_state(index)
+
+    def first_step(self):
+        pass
+
+    @property
+    def steps(self):
+        return self.position
+
+    def not_done(self):
+        return self.position < self.step_count
+
+    def step(self):
+        stop = min(self.position + self.speed, self.step_count)
+        for event in self._events(self._bounds[self.position], self._bounds[stop]):
+            self._apply(*event)
+        self.position = stop
+
+    def seek(self, step):
+        """Jumps to the state after step, rebuilding from the closest earlier keyframe
+        and only touching the cells that differ."""
+        step = max(0, min(step, self.step_count))
+        base = step - step % self.keyframe_every
+        state = self._keyframes[base].copy()
+        for event in self._events(self._bounds[base], self._bounds[step]):
+            state.apply(*event)
+        maze = self.maze
+        for index in range(len(state.walls)):
+            if (
+                maze.mask[index] != state.walls[index]
+                or maze.flags[index] != state.flags[index]
+                or maze.sets[index] != state.sets[index]
+            ):
+                maze.mask[index] = state.walls[index]
+                maze.flags[index] = state.flags[index]
+                maze.sets[index] = state.sets[index]
+                maze.inc[index] = 0
+                maze.changed(index)
+        maze.current = [
+            index for index, flags in enumerate(state.flags) if flags & CURRENT_BIT
+        ]
+        self.position = step
@@ -0,0 +1,368 @@
+"""Maze generation as a local service: a daemon on a Unix socket in front of a pool of
+warm worker processes, and a small blocking client.
+
+The protocol is JSON lines. Every request is an object with an op, "generate" or
+"stats", and an optional id echoed back in the reply so a connection can pipeline
+requests and match up replies arriving out of order:
+
+    {"id": 1, "op": "generate", "generator": "Kruskal", "x": 40, "y": 30, "seed": 7,
+     "break_walls_chance": 0, "braid": 0.2, "solver": "Depth First"}
+
+A generate reply carries the packed walls base64 encoded along with the rest of
+Maze.packed(), sides as ints, plus route when a solver was asked for, or error if it
+failed.
+"""
+import asyncio
+import base64
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .maze_obj import Maze
+from .maze_utils import glRand
+
+# Grids every worker builds up front, more are added as requests ask for them
+COMMON_SIZES = ((20, 20), (50, 50), (100, 100))
+# Requests at or under this many cells are batched, bigger ones go to a worker by
+# themselves
+BATCH_CELLS = 10_000
+BATCH_SIZE = 32
+BATCH_DELAY = 0.002
+# Latencies kept for the percentiles in stats
+LATENCY_WINDOW = 4096
+# Grids each worker keeps, the least recently used size is dropped past this
+GRID_CACHE = 4
+
+# Per worker process: (x, y) -> Maze reused for every request of that size
+_GRIDS = OrderedDict()
+
+
+def _warm(sizes):
+    for x, y in sizes:
+        _grid(x, y)
+
+
+def _grid(x, y):
+    maze = _GRIDS.get((x, y))
+    if maze is None:
+        maze = _GRIDS[x, y] = Maze()
+        maze.set_bounds(x, y)
+        while len(_GRIDS) > GRID_CACHE:
+            _GRIDS.popitem(last=False)
+    else:
+        _GRIDS.move_to_end((x, y))
+        maze.reset()
+    return maze
+
+
+def _run(job):
+    # Imported in the worker so the daemon itself never loads the algorithms
+    from .registry import GENERATORS, SOLVERS
+
+    x, y = job["x"], job["y"]
+    if job.get("seed") is not None:
+        glRand.seed(job["seed"])
+    generator = GENERATORS.get(job.get("generator", "Growing Tree"))
+    if generator is None:
+        raise ValueError("Unknown generator {}".format(job.get("generator")))
+    maze = _grid(x, y)
+    gen = generator(maze, job.get("break_walls_chance", 0), False)
+    gen.first_step()
+    while gen.not_done():
+        gen.step()
+    if job.get("braid"):
+        maze.braid(job["braid"])
+    reply = {
+        "walls": base64.b64encode(maze.mask).decode("ascii"),
+        "x": x,
+        "y": y,
+        "start": maze.start,
+        "end": maze.end,
+        "start_side": maze.start_side,
+        "end_side": maze.end_side,
+        "origin": maze.origin,
+    }
+    if job.get("solver"):
+        solver = SOLVERS.get(job["solver"])
+        if solver is None:
+            raise ValueError("Unknown solver {}".format(job["solver"]))
+        reply["route"] = solver(maze, False).solve()
+    return reply
+
+
+def _run_batch(jobs):
+    """Runs jobs one after another in a worker, returning (reply, seconds) for each."""
+    results = []
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            reply = _run(job)
+        except Exception as err:
+            reply = {"error": repr(err)}
+        results.append((reply, time.perf_counter() - start))
+    return results
+
+
+def unpack(reply):
+    """Rebuilds the Maze a generate reply describes."""
+    return Maze.from_walls(
+        bytearray(base64.b64decode(reply["walls"])),
+        reply["x"],
+        reply["y"],
+        reply["start"],
+        reply["end"],
+        reply["start_side"],
+        reply["end_side"],
+        reply.get("origin"),
+    )
+
+
+class Stats:
+    """Throughput and latency counters, latency being from a request arriving to its
+    reply being ready."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.cells = 0
+        self.batches = 0
+        self.batched = 0
+        self.work = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def done(self, reply, latency, work, cells):
+        self.requests += 1
+        self.errors += "error" in reply
+        self.cells += cells
+        self.work += work
+        self.latencies.append(latency)
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        ordered = sorted(self.latencies)
+
+        def percentile(p):
+            return (
+                ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+                if ordered
+                else 0.0
+            )
+
+        return {
+            "uptime": elapsed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "requests_per_second": self.requests / elapsed if elapsed else 0.0,
+            "cells_per_second": self.cells / elapsed if elapsed else 0.0,
+            "batches": self.batches,
+            "mean_batch": self.batched / self.batches if self.batches else 0.0,
+            "mean_work": self.work / self.requests if self.requests else 0.0,
+            "latency_p50": percentile(0.5),
+            "latency_p99": percentile(0.99),
+            "latency_max": ordered[-1] if ordered else 0.0,
+        }
+
+
+class Daemon:
+    """Serves requests on a Unix socket from a process pool. Each worker keeps a grid
+    for each of the last GRID_CACHE sizes it has seen and resets it in place between
+    requests. Small requests are held for up to batch_delay seconds, or until batch_size
+    of them are waiting, then split into one batch per worker so the pool's per task
+    overhead is paid once per batch."""
+
+    def __init__(
+        self,
+        path,
+        workers=None,
+        sizes=COMMON_SIZES,
+        batch_size=BATCH_SIZE,
+        batch_delay=BATCH_DELAY,
+        batch_cells=BATCH_CELLS,
+    ) -> None:
+        self.path = path
+        self.workers = workers or os.cpu_count()
+        self.sizes = tuple(sizes)
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.batch_cells = batch_cells
+        self.stats = Stats()
+        self.pool = None
+        self._pending = []
+        self._timer = None
+        self._loop = None
+
+    async def serve(self, ready=None):
+        """Serves until cancelled, setting the threading.Event ready once listening."""
+        self._loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=_warm, initargs=(self.sizes,)
+        )
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        server = await asyncio.start_unix_server(self._connection, self.path)
+        self.stats = Stats()
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    async def _connection(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._answer(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def _answer(self, line, writer):
+        try:
+            request = json.loads(line)
+            op = request.get("op", "generate")
+            if op == "stats":
+                reply = self.stats.snapshot()
+            elif op == "generate":
+                reply = await self.submit(request)
+            else:
+                reply = {"error": "Unknown op {}".format(op)}
+        except (ValueError, KeyError, TypeError, AttributeError) as err:
+            request, reply = {}, {"error": repr(err)}
+        if "id" in request:
+            reply["id"] = request["id"]
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+    def submit(self, job):
+        """Queues a generate request, returning a future of its reply."""
+        future = self._loop.create_future()
+        entry = (job, future, time.perf_counter())
+        if job["x"] * job["y"] > self.batch_cells:
+            self._dispatch([entry])
+            return future
+        self._pending.append(entry)
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.batch_delay, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        # Spread what is waiting over the workers rather than queueing it all behind one
+        share = -(-len(pending) // self.workers)
+        for start in range(0, len(pending), share or 1):
+            self._dispatch(pending[start : start + share])
+
+    def _dispatch(self, batch):
+        self.stats.batches += 1
+        self.stats.batched += len(batch)
+        done = asyncio.wrap_future(
+            self.pool.submit(_run_batch, [job for job, _, _ in batch]), loop=self._loop
+        )
+        done.add_done_callback(lambda result: self._finish(batch, result))
+
+    def _finish(self, batch, result):
+        now = time.perf_counter()
+        if result.exception() is not None:
+            results = [({"error": repr(result.exception())}, 0.0)] * len(batch)
+        else:
+            results = result.result()
+        for (job, future, arrived), (reply, work) in zip(batch, results):
+            self.stats.done(reply, now - arrived, work, job["x"] * job["y"])
+            if not future.done():
+                future.set_result(reply)
+
+
+class Client:
+    """Blocking client holding one connection, one request in flight at a time.
+
+    with Client("/tmp/py_maze.sock") as client:
+        maze = unpack(client.generate("Kruskal", 40, 30, seed=7))
+    """
+
+    def __init__(self, path) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self._file = self.sock.makefile("rwb")
+        self._id = 0
+
+    def request(self, **request):
+        self._id += 1
+        request["id"] = self._id
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        return json.loads(self._file.readline())
+
+    def generate(self, generator, x, y, **options):
+        return self.request(op="generate", generator=generator, x=x, y=y, **options)
+
+    def stats(self):
+        return self.request(op="stats")
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_test(
+    path, count=1000, clients=8, generator="Growing Tree", x=20, y=20, **options
+):
+    """Sends count generate requests from clients threads at once and returns the client
+    side timings plus the daemon's stats."""
+    latencies = []
+    errors = []
+    per_client = [count // clients + (i < count % clients) for i in range(clients)]
+
+    def run(requests):
+        with Client(path) as client:
+            for _ in range(requests):
+                start = time.perf_counter()
+                reply = client.generate(generator, x, y, **options)
+                latencies.append(time.perf_counter() - start)
+                if "error" in reply:
+                    errors.append(reply["error"])
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    with Client(path) as client:
+        daemon = client.stats()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "elapsed": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+        "latency_p99": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+        "daemon": daemon,
+    }
@@ -1,25 +1,41 @@
 import random
+from array import array
 
 from . import maze_utils
-from .maze_utils import DIRECTION
 
 
 class Solver_Base:
     visible = False
     display = ""
+    # Whether solve() works from the topology tables alone, as for the generators
+    any_topology = False
 
     def __init__(self, maze, watch):
+        if not hasattr(maze, "cells"):
+            raise TypeError(
+                "{} needs a Maze with cells, not {}".format(
+                    self.display, type(maze).__name__
+                )
+            )
+        if not self.any_topology and maze.topology and maze.topology.name != "square":
+            raise ValueError(
+                "{} needs a square grid, not {}".format(
+                    self.display, maze.topology.name
+                )
+            )
         self.maze = maze
         self.route = []
         self.finished = False
         self._step = None
         self.watch = watch
+        self.steps = 0
+        # Solution length, kept from when it was found since marking uses the route up
+        self.length = 0
 
     def set_up(self):
-        if self.maze.maze is None:
+        if not self.maze.cells:
             return
-        for cell in self.maze.allCells():
-            cell.clear_state()
+        self.maze.clear_states()
         x1, y1 = self.maze.start
         x0, y0 = maze_utils.take_step(self.maze.start_side, *self.maze.start)
         self.maze[x1, y1].visited = False
@@ -32,9 +48,48 @@ class Solver_Base:
     def step(self):
         self.check_finished()
         self._step()
+        self.steps += 1
         while not self.watch and self.not_done():
             self.check_finished()
             self._step()
+            self.steps += 1
+
+    def route_length(self):
+        """Length of the route as it stands, cheap enough to poll while solving, and of
+        the solution once finished."""
+        if self.finished:
+            return self.length
+        return len(self.route)
+
+    async def events(self, chunk=256):
+        """Runs the solver as an async iterator yielding (step count, phase) for every
+        step, handing control back to the event loop every chunk steps."""
+        # Only async callers need asyncio, keep it out of the solvers' import
+        import asyncio
+
+        self.set_up()
+        count = 0
+        while self.not_done():
+            self.check_finished()
+            phase = self._step.__name__
+            self._step()
+            count += 1
+            yield count, phase
+            if not count % chunk:
+                await asyncio.sleep(0)
+
+    def solve(self):
+        """Runs the solver to the exit without animating the route and returns it, empty
+        when the exit can't be reached."""
+        self.set_up()
+        self.check_finished()
+        while not self.finished and self.not_done():
+            self._step()
+            self.check_finished()
+        return self.solution() if self.finished else []
+
+    def solution(self):
+        return [step for step in self.route if not self.maze.out_of_bounds(*step)]
 
     def mark_route(self):
         while self.route:
@@ -47,6 +102,7 @@ class Solver_Base:
 
     def check_finished(self):
         if not self.finished and self.route[-1] == self.maze.end:
+            self.length = len(self.solution())
             self.maze.clear_current()
             self._step = self.mark_route
             self.finished = True
@@ -78,21 +134,17 @@ class All_Left(Solver_Base):
                 start = 1
             else:
                 start = 3
-        dirs = [DIRECTION((start - i) % 4) for i in range(3)]
+        dirs = [maze_utils.DIRECTIONS[(start - i) % 4] for i in range(3)]
 
         # Try to turn left
         left = dirs.pop(0)
         if self.maze[x1, y1].neighbors[left.value] is not None:
-            tx, ty = maze_utils.take_step(left, x1, y1)
-            self.take_step(tx, ty)
-            self.route.append([tx, ty])
+            self._follow(*maze_utils.take_step(left, x1, y1))
             return
 
         # Try to move forward
-        tx, ty = x1 + dx, y1 + dy
         if self.maze[x1, y1].neighbors[(start + 1) % 4] is not None:
-            self.take_step(tx, ty)
-            self.route.append([tx, ty])
+            self._follow(x1 + dx, y1 + dy)
             return
 
         # Try to pick a new direction and take a step
@@ -101,72 +153,141 @@ class All_Left(Solver_Base):
             if [tx, ty] == [x2, y2]:
                 continue
             if self.maze[x1, y1].neighbors[dir.value] is not None:
-                self.take_step(tx, ty)
-                self.route.append([tx, ty])
+                self._follow(tx, ty)
                 return
 
         # Have to turn around
-        self.take_step(x2, y2)
-        self.route.extend([[x1, y1], [x2, y2]])
+        self.route.append([x1, y1])
+        self._follow(x2, y2)
+
+    def _follow(self, x, y):
+        # Short of the exit only the entrance leads off the grid, so the wall has been
+        # followed all the way back round and the exit can't be reached
+        if self.maze.out_of_bounds(x, y):
+            self._step = None
+            return
+        self.take_step(x, y)
+        self.route.append([x, y])
+
+
+def _dfs_order(count):
+    """Direction try order for each arrival direction: keep going forward, then the rest
+    in order."""
+    return tuple(
+        (arrival,) + tuple(d for d in range(count) if d != arrival)
+        for arrival in range(count)
+    )
+
+
+_DFS_ORDER = _dfs_order(4)
 
 
 class Depth_First(Solver_Base):
+    """Stack entries are packed as index << 8 | arrival direction << 4 | directions
+    tried, and on_route marks cells as 1 while on the route and 2 once backed out of, so
+    a cell is only ever entered once. solve() only needs the topology tables so it works
+    on any grid, the animated steps are square only."""
+
     visible = True
     display = "Depth First"
+    any_topology = True
 
     def __init__(self, maze, watch):
         super().__init__(maze, watch)
-        self._step = self._step.depth_first_step
+        self.stack = array("q")
+        self.on_route = bytearray()
+        self.order = _DFS_ORDER
+        self._step = self.depth_first_step
+
+    def _start(self):
+        topology = self.maze.topology
+        start = self.maze.start_index
+        arrival = topology.opposite[self.maze.start_side]
+        self.order = _DFS_ORDER if topology.count == 4 else _dfs_order(topology.count)
+        self.stack = array("q", [start << 8 | arrival << 4])
+        self.on_route = bytearray(len(self.maze.mask))
+        self.on_route[start] = 1
 
-    def depth_first_step(self):
-        x1, y1 = self.route[-1]
-
-        # Try to move forward
-        try:
-            x2, y2 = self.route[-2]
-            dx, dy = x1 - x2, y1 - y2
-            if dx != 0:
-                if dx > 0:
-                    direction = DIRECTION.RIGHT
-                else:
-                    direction = DIRECTION.LEFT
-            else:
-                if dy > 0:
-                    direction = DIRECTION.BOTTOM
-                else:
-                    direction = DIRECTION.TOP
-            tx, ty = x1 + dx, y1 + dy
-        # We reached our starting cell
-        except IndexError:
-            direction = maze_utils.opposite(self.maze.start_side)
-            tx, ty = maze_utils.take_step(direction, x1, y1)
-
-        if (
-            self.maze[x1, y1].neighbors[direction.value] is not None
-            and not self.maze.isVisited(tx, ty)
-            and [tx, ty] not in self.route
-        ):
-            self.take_step(tx, ty)
-            self.route.append([tx, ty])
+    def set_up(self):
+        super().set_up()
+        if not self.maze.cells:
             return
+        self._start()
 
-        # Try to pick a new direction
-        for dir_int in range(4):
-            if dir_int == direction.value:
+    def depth_first_step(self):
+        if not self.stack:
+            self._step = None
+            return
+        top = self.stack[-1]
+        index, order, tried = top >> 8, self.order[top >> 4 & 15], top & 15
+        open_sides = self.maze.mask[index] & ~self.maze.edges[index]
+        while tried < len(order):
+            dir = order[tried]
+            tried += 1
+            if not open_sides >> dir & 1:
                 continue
-            tx, ty = maze_utils.take_step(dir_int, *self.route[-1])
-            if (
-                self.maze[x1, y1].neighbors[dir_int] is not None
-                and not self.maze.isVisited(tx, ty)
-                and [tx, ty] not in self.route
-            ):
-                self.take_step(tx, ty)
-                self.route.append([tx, ty])
+            target = index + self.maze.offsets[dir]
+            if not self.on_route[target]:
+                self.stack[-1] = top & ~15 | tried
+                self.on_route[target] = 1
+                self.stack.append(target << 8 | dir << 4)
+                self.take_step(*self.maze.position(target))
                 return
-        # Unroll route
-        x0, y0 = self.route.pop(-1)
-        self.maze[x0, y0].closed = True
-        self.take_step(x0, y0)
+        # Dead end, unroll route
+        self.stack.pop()
+        self.on_route[index] = 2
+        self.maze.cells[index].closed = True
+        if self.stack:
+            self.maze.set_current_index(self.stack[-1] >> 8)
+
+    def check_finished(self):
+        if self.finished or not self.stack:
+            return
+        if self.stack[-1] >> 8 == self.maze.end_index:
+            self.route = self.solution()
+            self.maze.clear_current()
+            self._step = self.mark_route
+            self.finished = True
+
+    def solution(self):
+        return [list(self.maze.position(entry >> 8)) for entry in self.stack]
+
+    def route_length(self):
+        return len(self.stack)
+
+    def solve(self):
+        """Runs the search straight off the cells' walls without touching their visual
+        state and returns the route."""
+        if not self.maze.cells:
+            return []
+        self._start()
+        stack, on_route, orders = self.stack, self.on_route, self.order
+        mask, edges, offsets = self.maze.mask, self.maze.edges, self.maze.offsets
+        end, count = self.maze.end_index, self.maze.topology.count
+        while stack:
+            top = stack[-1]
+            index = top >> 8
+            if index == end:
+                break
+            order = orders[top >> 4 & 15]
+            tried = top & 15
+            open_sides = mask[index] & ~edges[index]
+            while tried < count:
+                dir = order[tried]
+                tried += 1
+                if not open_sides >> dir & 1:
+                    continue
+                target = index + offsets[dir]
+                if not on_route[target]:
+                    stack[-1] = top & ~15 | tried
+                    on_route[target] = 1
+                    stack.append(target << 8 | dir << 4)
+                    break
+            else:
+                stack.pop()
+                on_route[index] = 2
+        self.finished = bool(stack)
+        return self.solution()
 
 
 class A_Star(Solver_Base):
@@ -178,10 +299,12 @@ class A_Star(Solver_Base):
         self._step = self.a_step
         self.dist_map = {}
         self.node = None
+        # Node expanded last, the end of the best path so far
+        self.last = None
 
     def set_up(self):
         super().set_up()
-        if self.maze.maze is None:
+        if not self.maze.cells:
             return
         x, y = self.maze.start
         newNode = maze_utils.TreeNode(self.maze[x, y], self.maze.start)
@@ -190,7 +313,7 @@ class A_Star(Solver_Base):
         )
 
     def check_finished(self):
-        if self.finished:
+        if self.finished or not self.dist_map:
             return
         minDist = min(self.dist_map.keys())
         node = self.dist_map[minDist][random.randrange(len(self.dist_map[minDist]))]
@@ -199,11 +322,16 @@ class A_Star(Solver_Base):
             self._step = self.mark_route
             self.finished = True
             self.node = node
+            self.length = _path_length(node)
 
     def a_step(self):
+        if not self.dist_map:
+            self._step = None
+            return
         minDist = min(self.dist_map.keys())
         node = self.dist_map[minDist].pop(random.randrange(len(self.dist_map[minDist])))
 
+        self.last = node
         self.take_step(*node.pos)
         if not self.dist_map[minDist]:
             self.dist_map.pop(minDist)
@@ -217,9 +345,31 @@ class A_Star(Solver_Base):
                 newChild
             )
 
+    def route_length(self):
+        if self.finished:
+            return self.length
+        return _path_length(self.last)
+
+    def solution(self):
+        route = []
+        node = self.node
+        while node:
+            route.append(list(node.pos))
+            node = node.parent
+        route.reverse()
+        return route
+
     def mark_route(self):
         while self.node:
             self.maze.set_current(*self.node.pos, append=True)
             self.node = self.node.parent
             return
         self._step = None
+
+
+def _path_length(node):
+    length = 0
+    while node:
+        length += 1
+        node = node.parent
+    return length
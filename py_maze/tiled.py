@@ -0,0 +1,357 @@
+"""Out of core mazes: packed walls stored on disk in square tiles, paged in through a
+bounded LRU cache, and a breadth first solver that walks the frontier a tile at a
+time."""
+import os
+import struct
+import tempfile
+from collections import Counter, OrderedDict
+
+from .maze_utils import DIRECTION, DX, DY, OPPOSITE
+from .topology import square
+
+_MAGIC = b"PYMZTILE"
+_HEADER = struct.Struct("<8sQQIqqqqBB")
+# Parent byte of the start cell in the solver's scratch store, other reached cells hold
+# the direction they were entered in plus one
+_ROOT = 5
+
+
+class TileStore:
+    """A x by y grid of bytes in a file, cut into tile by tile squares stored one after
+    another in tile order (tx * tiles high + ty), cells inside a tile at
+    (x % tile) * tile + y % tile. Edge tiles are padded to full size. At most
+    cache_tiles tiles are held in memory, the least recently used being written back if
+    changed and dropped to make room."""
+
+    def __init__(self, path, x, y, tile=256, cache_tiles=64, offset=0, writable=False):
+        self.path = path
+        self.x = x
+        self.y = y
+        self.tile = tile
+        self.cache_tiles = cache_tiles
+        self.offset = offset
+        self.writable = writable
+        self.tiles_high = (y + tile - 1) // tile
+        self.tiles_wide = (x + tile - 1) // tile
+        self._fd = os.open(path, os.O_RDWR if writable else os.O_RDONLY)
+        self._cache = OrderedDict()
+        self._dirty = set()
+        # Access statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = Counter()
+
+    @classmethod
+    def create(cls, path, x, y, tile=256, cache_tiles=64, offset=0):
+        """Makes a zero filled store, keeping any offset bytes at the start of path."""
+        tiles = ((x + tile - 1) // tile) * ((y + tile - 1) // tile)
+        with open(path, "ab") as f:
+            f.truncate(offset)
+            f.truncate(offset + tiles * tile * tile)
+        return cls(path, x, y, tile, cache_tiles, offset, writable=True)
+
+    def tile_of(self, x, y):
+        return x // self.tile, y // self.tile
+
+    def get_tile(self, tx, ty, dirty=False):
+        """The bytearray of tile (tx, ty), loading it if it is not resident. Pass dirty
+        when about to change it so it gets written back."""
+        key = tx * self.tiles_high + ty
+        data = self._cache.get(key)
+        if data is None:
+            self.misses += 1
+            self.loads[tx, ty] += 1
+            if len(self._cache) >= self.cache_tiles:
+                self._evict()
+            size = self.tile * self.tile
+            data = bytearray(os.pread(self._fd, size, self.offset + key * size))
+            self._cache[key] = data
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        if dirty:
+            self._dirty.add(key)
+        return data
+
+    def _evict(self):
+        key, data = self._cache.popitem(last=False)
+        self.evictions += 1
+        if key in self._dirty:
+            self._write(key, data)
+
+    def _write(self, key, data):
+        size = self.tile * self.tile
+        os.pwrite(self._fd, data, self.offset + key * size)
+        self._dirty.discard(key)
+
+    def __getitem__(self, pos):
+        x, y = pos
+        tile = self.tile
+        return self.get_tile(x // tile, y // tile)[(x % tile) * tile + y % tile]
+
+    def __setitem__(self, pos, value):
+        x, y = pos
+        tile = self.tile
+        self.get_tile(x // tile, y // tile, True)[(x % tile) * tile + y % tile] = value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "resident": len(self._cache),
+            "tiles_loaded": len(self.loads),
+            "most_loaded": self.loads.most_common(5),
+        }
+
+    def flush(self):
+        for key in list(self._dirty):
+            self._write(key, self._cache[key])
+
+    def close(self):
+        if self._fd is not None:
+            if self.writable:
+                self.flush()
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _FlatWalls:
+    """maze.mask lookalike over a TileStore so Cell can read flat indices."""
+
+    __slots__ = ("store",)
+
+    def __init__(self, store) -> None:
+        self.store = store
+
+    def __len__(self):
+        return self.store.x * self.store.y
+
+    def __getitem__(self, index):
+        return self.store[divmod(index, self.store.y)]
+
+
+class _FlatEdges:
+    """maze.edges lookalike worked out from the position instead of stored per cell."""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y) -> None:
+        self.x = x
+        self.y = y
+
+    def __getitem__(self, index):
+        x, y = divmod(index, self.y)
+        return edge_bits(self.x, self.y, x, y)
+
+
+class TileCell:
+    """Read only cell of a TiledMaze. There is no cell state on disk, so unlike Cell it
+    only answers for its walls and neighbours."""
+
+    __slots__ = ("maze", "_index")
+
+    def __init__(self, maze, index) -> None:
+        self.maze = maze
+        self._index = index
+
+    def __eq__(self, other):
+        if isinstance(other, TileCell):
+            return self.maze is other.maze and self._index == other._index
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._index)
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def walls(self):
+        """The cell's mask byte, a set bit for every open side."""
+        return self.maze.mask[self._index]
+
+    @property
+    def neighbors(self):
+        """Cell on each side, None behind a wall and -1 for an exit off the grid."""
+        return [self.neighbor(dir) for dir in range(4)]
+
+    def neighbor(self, dir):
+        if isinstance(dir, DIRECTION):
+            dir = dir.value
+        maze, index = self.maze, self._index
+        if not maze.mask[index] >> dir & 1:
+            return None
+        if maze.edges[index] >> dir & 1:
+            return -1
+        return TileCell(maze, index + maze.offsets[dir])
+
+    def __repr__(self) -> str:
+        return "<TileCell ({}, {}): {:04b}>".format(
+            *self.maze.position(self._index), self.walls
+        )
+
+
+def edge_bits(width, height, x, y):
+    return (
+        (y == 0) << DIRECTION.TOP.value
+        | (x == width - 1) << DIRECTION.RIGHT.value
+        | (y == height - 1) << DIRECTION.BOTTOM.value
+        | (x == 0) << DIRECTION.LEFT.value
+    )
+
+
+class TiledMaze:
+    """Read only maze backed by a tiled wall file, answering the same lookups as Maze:
+    maze[x, y] gives a TileCell whose neighbors come from the tiles, plus isWall,
+    out_of_bounds, index, position and step_index. Only cache_tiles tiles are ever in
+    memory. It has no cells, so the registered solvers refuse it, solve() below is
+    the one that works on it."""
+
+    def __init__(self, path, cache_tiles=64) -> None:
+        with open(path, "rb") as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+        magic, x, y, tile, sx, sy, ex, ey, start_side, end_side = header
+        if magic != _MAGIC:
+            raise ValueError("{} is not a tiled maze".format(path))
+        self.path = path
+        self.x = x
+        self.y = y
+        self.start = [sx, sy]
+        self.end = [ex, ey]
+        self.start_side = start_side
+        self.end_side = end_side
+        self.store = TileStore(path, x, y, tile, cache_tiles, _HEADER.size)
+        self.mask = _FlatWalls(self.store)
+        self.edges = _FlatEdges(x, y)
+        self.topology = square(x, y)
+        self.offsets = self.topology.offsets
+        self.start_index = self.index(*self.start)
+        self.end_index = self.index(*self.end)
+
+    @staticmethod
+    def write(path, source, tile=256):
+        """Writes a Maze or Maze.packed() tuple out as a tiled maze file."""
+        if hasattr(source, "packed"):
+            source = source.packed()
+        data, x, y, start, end, start_side, end_side = source[:7]
+        with open(path, "wb") as f:
+            f.write(
+                _HEADER.pack(_MAGIC, x, y, tile, *start, *end, start_side, end_side)
+            )
+        with TileStore.create(path, x, y, tile, 1, _HEADER.size) as store:
+            for tx in range(store.tiles_wide):
+                for ty in range(store.tiles_high):
+                    block = store.get_tile(tx, ty, True)
+                    y0 = ty * tile
+                    height = min(tile, y - y0)
+                    for i in range(min(tile, x - tx * tile)):
+                        column = (tx * tile + i) * y + y0
+                        row = i * tile
+                        block[row : row + height] = data[column : column + height]
+
+    def __getitem__(self, pos):
+        if len(pos) == 2:
+            return TileCell(self, pos[0] * self.y + pos[1])
+
+    def isWall(self, x, y, direction):
+        return not self.store[x, y] >> direction & 1
+
+    def out_of_bounds(self, x, y):
+        return x < 0 or x >= self.x or y < 0 or y >= self.y
+
+    def index(self, x, y):
+        return x * self.y + y
+
+    def position(self, index):
+        return divmod(index, self.y)
+
+    def step_index(self, index, dir):
+        if self.edges[index] >> dir & 1:
+            return -1
+        return index + self.offsets[dir]
+
+    def close(self):
+        self.store.close()
+
+
+def solve(maze, scratch=None, cache_tiles=None):
+    """Breadth first search from start to end of a TiledMaze, returning the route as
+    [x, y] pairs, empty if the end can't be reached.
+
+    Each level's frontier is bucketed by tile and worked through a tile at a time, so a
+    tile's walls and parent bytes are paged in once per level rather than once per cell.
+    Parents go to a scratch TileStore with the maze's tiling, in a temporary file unless
+    scratch names one, so the search itself also runs out of core."""
+    store = maze.store
+    tile = store.tile
+    if cache_tiles is None:
+        cache_tiles = store.cache_tiles
+    owned = scratch is None
+    if owned:
+        handle, scratch = tempfile.mkstemp(suffix=".tiles")
+        os.close(handle)
+    parents = TileStore.create(scratch, maze.x, maze.y, tile, cache_tiles)
+    try:
+        sx, sy = maze.start
+        parents[sx, sy] = _ROOT
+        frontier = {store.tile_of(sx, sy): [(sx, sy)]}
+        found = tuple(maze.end) == (sx, sy)
+        while frontier and not found:
+            found, frontier = _expand(maze, parents, frontier)
+        route = _route(maze, parents) if found else []
+    finally:
+        parents.close()
+        if owned:
+            os.remove(scratch)
+    return route
+
+
+def _expand(maze, parents, frontier):
+    """One BFS level, returning whether the end was reached and the next frontier."""
+    store, tile = maze.store, maze.store.tile
+    width, height = maze.x, maze.y
+    end = tuple(maze.end)
+    following = {}
+    for tx, ty in sorted(frontier):
+        walls = store.get_tile(tx, ty)
+        for x, y in frontier[tx, ty]:
+            mask = walls[(x % tile) * tile + y % tile] & ~edge_bits(width, height, x, y)
+            for dir in range(4):
+                if not mask >> dir & 1:
+                    continue
+                nx, ny = x + DX[dir], y + DY[dir]
+                key = (nx // tile, ny // tile)
+                block = parents.get_tile(*key)
+                local = (nx % tile) * tile + ny % tile
+                if block[local]:
+                    continue
+                parents.get_tile(*key, True)[local] = dir + 1
+                if (nx, ny) == end:
+                    return True, {}
+                following.setdefault(key, []).append((nx, ny))
+    return False, following
+
+
+def _route(maze, parents):
+    x, y = maze.end
+    route = [[x, y]]
+    while True:
+        arrived = parents[x, y]
+        if arrived == _ROOT:
+            break
+        back = OPPOSITE[arrived - 1]
+        x, y = x + DX[back], y + DY[back]
+        route.append([x, y])
+    route.reverse()
+    return route
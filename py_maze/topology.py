@@ -0,0 +1,119 @@
+"""Grid topologies described by neighbour tables instead of hard coded directions.
+
+A topology is a box of cells of any number of axes, flat indexed with the last axis
+fastest, and a list of unit steps between neighbours. Everything the index based
+generators and solvers need is worked out from those once: the flat offset of every
+direction, its opposite, and a mask per cell of the directions that lead off the grid. A
+cell's open sides fit one byte, so up to 8 directions are supported."""
+from itertools import permutations
+
+# Most directions a one byte wall mask can hold
+MAX_DIRECTIONS = 8
+
+
+class Topology:
+    def __init__(self, name, shape, vectors, names) -> None:
+        if len(vectors) > MAX_DIRECTIONS:
+            raise ValueError(
+                "At most {} directions fit a cell byte".format(MAX_DIRECTIONS)
+            )
+        self.name = name
+        self.shape = tuple(shape)
+        strides, stride = [], 1
+        for length in reversed(self.shape):
+            strides.append(stride)
+            stride *= length
+        self.strides = tuple(reversed(strides))
+        self.size = stride
+        self.vectors = tuple(tuple(vector) for vector in vectors)
+        self.names = tuple(names)
+        self.count = len(self.vectors)
+        self.full = (1 << self.count) - 1
+        self.offsets = tuple(
+            sum(step * stride for step, stride in zip(vector, self.strides))
+            for vector in self.vectors
+        )
+        self.opposite = tuple(
+            self.vectors.index(tuple(-step for step in vector))
+            for vector in self.vectors
+        )
+        # Same idea as maze_utils.PERMUTATIONS and INBOUND for this many directions
+        self.permutations = tuple(permutations(range(self.count)))
+        self.inbound = tuple(
+            tuple(d for d in range(self.count) if not mask >> d & 1)
+            for mask in range(1 << self.count)
+        )
+
+    def __repr__(self) -> str:
+        return "<Topology {} {}>".format(self.name, "x".join(map(str, self.shape)))
+
+    def index(self, *coords):
+        return sum(coord * stride for coord, stride in zip(coords, self.strides))
+
+    def coords(self, index):
+        if len(self.shape) == 2:
+            return divmod(index, self.shape[1])
+        coords = []
+        for length in reversed(self.shape):
+            index, coord = divmod(index, length)
+            coords.append(coord)
+        return tuple(reversed(coords))
+
+    def edges(self):
+        """Mask per cell of the directions that lead off the grid. The cells on one face
+        of the box are runs of stride bytes every length * stride, so each face is ORed
+        in with a handful of slice translates rather than a loop over cells."""
+        edges = bytearray(self.size)
+        for axis, (length, stride) in enumerate(zip(self.shape, self.strides)):
+            low = high = 0
+            for dir, vector in enumerate(self.vectors):
+                if vector[axis] < 0:
+                    low |= 1 << dir
+                elif vector[axis] > 0:
+                    high |= 1 << dir
+            block = length * stride
+            for first, bits in ((0, low), ((length - 1) * stride, high)):
+                if not bits:
+                    continue
+                table = bytes(value | bits for value in range(256))
+                if self.size // block <= stride:
+                    for start in range(first, self.size, block):
+                        run = slice(start, start + stride)
+                        edges[run] = edges[run].translate(table)
+                else:
+                    for start in range(first, first + stride):
+                        run = slice(start, None, block)
+                        edges[run] = edges[run].translate(table)
+        return edges
+
+
+def square(x, y):
+    """The classic grid, cells at x * height + y with DIRECTION's four sides."""
+    return Topology(
+        "square",
+        (x, y),
+        ((0, -1), (1, 0), (0, 1), (-1, 0)),
+        ("TOP", "RIGHT", "BOTTOM", "LEFT"),
+    )
+
+
+def cube(x, y, levels):
+    """levels square grids stacked, each a contiguous block laid out like square(x, y),
+    with UP and DOWN moving to the level before and after."""
+    return Topology(
+        "cube",
+        (levels, x, y),
+        ((0, 0, -1), (0, 1, 0), (0, 0, 1), (0, -1, 0), (-1, 0, 0), (1, 0, 0)),
+        ("TOP", "RIGHT", "BOTTOM", "LEFT", "UP", "DOWN"),
+    )
+
+
+def hexagonal(x, y):
+    """Hexagons in axial coordinates (column, row) over a rhombus shaped board, so every
+    direction is a fixed flat offset just like the square grid."""
+    return Topology(
+        "hexagonal",
+        (x, y),
+        ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)),
+        ("EAST", "NORTH_EAST", "NORTH_WEST", "WEST", "SOUTH_WEST", "SOUTH_EAST"),
+    )
@@ -0,0 +1,99 @@
+"""NumPy helpers for the packed wall mask: one uint8 per cell in an (x, y) array, so the
+flat index matches Maze.index, with a set bit for every open side."""
+import numpy as np
+
+from .maze_utils import DIRECTION, glRand
+
+TOP, RIGHT, BOTTOM, LEFT = (1 << dir.value for dir in DIRECTION)
+ALL = TOP | RIGHT | BOTTOM | LEFT
+
+
+def open_grid(x, y):
+    """Mask with every wall inside the grid knocked down."""
+    mask = np.full((x, y), ALL, dtype=np.uint8)
+    mask[:, 0] &= ALL ^ TOP
+    mask[:, -1] &= ALL ^ BOTTOM
+    mask[0, :] &= ALL ^ LEFT
+    mask[-1, :] &= ALL ^ RIGHT
+    return mask
+
+
+def add_wall(mask, horizontal, line, lo, hi, gap):
+    """Puts up one of maze_utils.division_walls' walls with two slice writes."""
+    if horizontal:
+        mask[lo:hi, line - 1] &= ALL ^ BOTTOM
+        mask[lo:hi, line] &= ALL ^ TOP
+        mask[gap, line - 1] |= BOTTOM
+        mask[gap, line] |= TOP
+    else:
+        mask[line - 1, lo:hi] &= ALL ^ RIGHT
+        mask[line, lo:hi] &= ALL ^ LEFT
+        mask[line - 1, gap] |= RIGHT
+        mask[line, gap] |= LEFT
+
+
+def open_exits(mask, maze):
+    mask[tuple(maze.start)] |= 1 << maze.start_side
+    mask[tuple(maze.end)] |= 1 << maze.end_side
+
+
+# Set bits in every possible mask byte
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def from_bytes(data, x, y):
+    """Writable mask from the packed bytes of Maze.walls()."""
+    return np.frombuffer(bytes(data), dtype=np.uint8).reshape(x, y).copy()
+
+
+def from_source(source):
+    """Read only mask of a Maze or Maze.packed() tuple, masks passing through."""
+    if isinstance(source, np.ndarray):
+        return source
+    if hasattr(source, "packed"):
+        source = source.packed()
+    walls, x, y = source[:3]
+    return np.frombuffer(bytes(walls), dtype=np.uint8).reshape(x, y)
+
+
+def dead_ends(mask):
+    """Cells with a single open side, exits counting as open."""
+    return POPCOUNT[mask] == 1
+
+
+def braid(mask, fraction, rng=None):
+    """Opens a wall in fraction of the dead ends, preferring walls shared with another
+    dead end so one opening removes both. Dead ends are found and opened in one sweep
+    over the whole mask, updating it in place, and the opened walls are returned as
+    (index, direction) pairs with each wall listed once."""
+    if not 0 <= fraction <= 1:
+        raise ValueError("braid fraction must be from 0 to 1, not {}".format(fraction))
+    if rng is None:
+        rng = np.random.default_rng(glRand.getrandbits(64))
+    x, y = mask.shape
+    flat = mask.reshape(-1)
+    dead = dead_ends(mask).reshape(-1)
+    candidates = np.flatnonzero(dead)
+    chosen = rng.choice(candidates, round(len(candidates) * fraction), replace=False)
+
+    closed = (open_grid(x, y).reshape(-1) & ~flat)[chosen]
+    offsets = np.array((-1, y, 1, -y))
+    bits = 1 << np.arange(4)
+    neighbors = np.clip(chosen[:, None] + offsets, 0, flat.size - 1)
+    score = rng.random((len(chosen), 4)) + dead[neighbors]
+    score[(closed[:, None] & bits) == 0] = -1
+    dirs = score.argmax(1)
+    keep = score.max(1) >= 0
+    chosen, dirs = chosen[keep], dirs[keep]
+
+    targets = chosen + offsets[dirs]
+    opposite = (dirs + 2) % 4
+    np.bitwise_or.at(flat, chosen, bits[dirs].astype(np.uint8))
+    np.bitwise_or.at(flat, targets, bits[opposite].astype(np.uint8))
+
+    # Two facing dead ends can pick the same wall, key each wall on its top or left cell
+    flip = (dirs == 0) | (dirs == 3)
+    index = np.where(flip, targets, chosen)
+    dirs = np.where(flip, opposite, dirs)
+    walls = np.unique(index * 4 + dirs)
+    return list(zip((walls >> 2).tolist(), (walls & 3).tolist()))
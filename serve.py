@@ -0,0 +1,51 @@
+"""Runs the maze service daemon, or load tests a running one.
+
+    python serve.py serve --socket /tmp/py_maze.sock --workers 4
+    python serve.py load --socket /tmp/py_maze.sock --count 5000 --clients 16
+"""
+import argparse
+import asyncio
+import json
+
+from py_maze.service import COMMON_SIZES, Daemon, load_test
+
+DEFAULT_SOCKET = "/tmp/py_maze.sock"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("serve", "load"))
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--sizes", type=int, nargs="+", help="square grids to prebuild")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--generator", default="Growing Tree")
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--solver")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        sizes = [(size, size) for size in args.sizes] if args.sizes else COMMON_SIZES
+        daemon = Daemon(args.socket, args.workers, sizes)
+        try:
+            asyncio.run(daemon.serve())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    options = {"solver": args.solver} if args.solver else {}
+    result = load_test(
+        args.socket,
+        args.count,
+        args.clients,
+        args.generator,
+        args.size,
+        args.size,
+        **options,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
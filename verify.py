@@ -0,0 +1,61 @@
+"""Differential correctness harness: generates seeded mazes with every generator and
+checks their shape, that the fast paths give identical walls and that the solvers agree.
+
+    python verify.py --seeds 200 --sizes 8 23 --break-walls 0 30 --braid 0 0.5
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+
+from py_maze import harness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 23])
+    parser.add_argument("--seeds", type=int, default=50, help="seeds per combination")
+    parser.add_argument("--break-walls", type=int, nargs="+", default=[0, 30])
+    parser.add_argument("--braid", type=float, nargs="+", default=[0, 0.5])
+    parser.add_argument("--generators", nargs="+", help="display names to check")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--no-tiled", action="store_true", help="skip the tiled store")
+    parser.add_argument("--show", type=int, default=20, help="failures to print")
+    parser.add_argument("--gui", action="store_true", help="check MainWindow too")
+    args = parser.parse_args()
+
+    jobs = harness.make_jobs(
+        args.generators, args.sizes, args.seeds, args.break_walls, args.braid
+    )
+    start = time.perf_counter()
+    failed = Counter()
+    shown = 0
+    for failure in harness.check_topologies():
+        failed["topologies"] += 1
+        print(failure)
+    if args.gui:
+        from Qt import QtWidgets
+
+        app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        for failure in harness.check_window_recording():
+            failed["window"] += 1
+            print(failure)
+    for job, failures in harness.run(jobs, args.processes, use_tiled=not args.no_tiled):
+        for failure in failures:
+            failed[job[0]] += 1
+            if shown < args.show:
+                print("{} {}x{} seed {} break {} braid {}: {}".format(*job, failure))
+                shown += 1
+    elapsed = time.perf_counter() - start
+    print(
+        "{} mazes in {:.1f} s ({:.0f} per minute), {} failures".format(
+            len(jobs), elapsed, len(jobs) / elapsed * 60, sum(failed.values())
+        )
+    )
+    for name, count in failed.most_common():
+        print("  {:<30} {}".format(name, count))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())